@@ -1,11 +1,22 @@
-from combine_and_format import combine_and_format
+import importlib
+import os
+import sys
+import threading
 import tkinter as tk
 from tkinter import filedialog, ttk
-from boto3 import Session
-from config.config import aws_access_key_id, aws_secret_access_key, aws_session_token
-from services.report_writer import *
-from services.auditor import *
-from services.io_loader import *
+
+# Heavy modules (pandas, openpyxl, matplotlib, boto3, PyPDF2) are imported on first use so the
+# window appears immediately. The ones every audit needs are pre-warmed in a background thread after
+# start-up; matplotlib loads in the chart worker processes and PyPDF2 only for PDF policies.
+PREWARM_MODULES = (
+    "pandas",
+    "openpyxl",
+    "boto3",
+    "services.io_loader",
+    "services.auditor",
+    "services.report_writer",
+    "combine_and_format",
+)
 
 
 class AuditApp:
@@ -18,7 +29,8 @@ class AuditApp:
         self.excel_path = None
         self.df_original = None
         self.df_clean = None
-        self.bedrock_runtime = self.init_bedrock_runtime()
+        self._bedrock_runtime = None
+        self._bedrock_lock = threading.Lock()
 
         # File paths for master report creation
         self.master_files = {
@@ -30,15 +42,38 @@ class AuditApp:
         }
 
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        threading.Thread(target=self.prewarm_modules, name="prewarm", daemon=True).start()
+
+    def on_close(self):
+        """Stops the report and chart worker processes (if any were started), then closes the window."""
+        for name in ("services.report_writer", "services.charts"):
+            module = sys.modules.get(name)
+            if module is not None:
+                module.shutdown_pool()
+        self.root.destroy()
+
+    @staticmethod
+    def prewarm_modules():
+        """Imports the heavy modules in the background; failures surface later on real use."""
+        for name in PREWARM_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"⚠️ Pre-warm of {name} failed: {e}")
+
+    @property
+    def bedrock_runtime(self):
+        """Bedrock client, created on first use."""
+        with self._bedrock_lock:
+            if self._bedrock_runtime is None:
+                self._bedrock_runtime = self.init_bedrock_runtime()
+            return self._bedrock_runtime
 
     def init_bedrock_runtime(self):
-        session = Session(
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            aws_session_token=aws_session_token,
-            region_name="us-west-2"
-        )
-        return session.client("bedrock-runtime")
+        # Client pool over settings.BEDROCK_ENDPOINTS; re-reads config/config.py when the session token expires
+        from services.bedrock_client import BedrockClientPool, config_file_credentials
+        return BedrockClientPool(credentials_provider=config_file_credentials)
 
     def create_widgets(self):
         frame = ttk.Frame(self.root, padding=20)
@@ -81,7 +116,8 @@ class AuditApp:
         file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx *.xls")])
         if file_path:
             try:
-                df = pd.read_excel(file_path)
+                from services.io_loader import load_excel_file, clean_data_sheet
+                df = load_excel_file(file_path)
                 self.df_original, self.df_clean = clean_data_sheet(df)
                 print("🧩 df_original.columns =", self.df_original.columns.tolist())
                 self.excel_path = file_path
@@ -95,6 +131,7 @@ class AuditApp:
         try:
             self.status_label.config(text="🔍 Auditing in progress... Please wait.", foreground="blue")
             self.root.update()
+            from services.report_writer import audit_and_flag
             df_flagged = audit_and_flag(self.df_original, self.df_clean, self.bedrock_runtime)
             self.status_label.config(text="✅ Audit complete. Report saved to audit_reports folder.", foreground="green")
         except Exception as e:
@@ -112,15 +149,22 @@ class AuditApp:
         self.update_files_status()
 
     def classify_files(self, file_paths):
+        # By content first (header columns in the first rows), then by file name for the rest
+        from services.source_sniffer import classify_sources
+        by_content = classify_sources(file_paths)
+        self.master_files.update(by_content)
+
         file_keywords = {
             'Expense Type Detail': ['expense type detail'],
             'EE Active': ['ee active'],
             'CF Information': ['cf information'],
             'Processor Paid Summary': ['processor paid summary'],
-            'Risk International Travel': ['risk', 'International', 'Travel']
+            'Risk International Travel': ['risk international', 'international travel']
         }
 
         for file_path in file_paths:
+            if str(file_path) in by_content.values():
+                continue
             filename = os.path.basename(file_path).lower()
 
             for file_type, keywords in file_keywords.items():
@@ -144,6 +188,12 @@ class AuditApp:
         try:
             self.status_label.config(text="🔧 Creating master report...", foreground="blue")
             self.root.update()
+            from combine_and_format import combine_and_format
+            from services.io_loader import clean_data_sheet
+            from services.report_writer import audit_and_flag
+            from services.auditor import new_run_id
+            from config.settings import PERSIST_ARTIFACTS
+            run_id = new_run_id()
 
             # Get the combined DataFrame directly
             merged_df = combine_and_format(
@@ -157,9 +207,14 @@ class AuditApp:
             self.status_label.config(text="🔍 Master report created. Now auditing...", foreground="blue")
             self.root.update()
 
+            if PERSIST_ARTIFACTS:
+                # keep the expensive merge; `python -m services.artifacts` can re-run later stages from it
+                from services.artifacts import save_frame
+                save_frame(merged_df, run_id, "merged")
+
             # Audit the DataFrame directly
             df_original, df_clean = clean_data_sheet(merged_df)
-            df_flagged = audit_and_flag(df_original, df_clean, self.bedrock_runtime)
+            df_flagged = audit_and_flag(df_original, df_clean, self.bedrock_runtime, run_id=run_id)
 
             self.status_label.config(text="✅ Master report created and audited in audit_reports folder!",
                                      foreground="green")
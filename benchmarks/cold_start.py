@@ -0,0 +1,119 @@
+"""
+Cold-start benchmark for the desktop app.
+
+Each sample runs in a fresh interpreter and measures:
+  - import_ms: `import app` (the module main.py imports before building the window)
+  - window_ms: import + AuditApp(root) + first idle update, i.e. until the window is drawn
+    (skipped when no display is available)
+and reports the heaviest modules pulled in at import time (from `python -X importtime`).
+
+    python benchmarks/cold_start.py [--runs 5] [--max-import-ms 500] [--json out.json]
+
+Exits non-zero when the median import time exceeds --max-import-ms, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import app
+print((time.perf_counter() - t0) * 1000)
+"""
+
+_WINDOW_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import tkinter as tk
+from app import AuditApp
+root = tk.Tk()
+AuditApp(root)
+root.update_idletasks()
+root.update()
+print((time.perf_counter() - t0) * 1000)
+root.destroy()
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    paths = [str(ROOT), str(ROOT / "app")]
+    if env.get("PYTHONPATH"):
+        paths.append(env["PYTHONPATH"])
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    return env
+
+
+def _sample(snippet: str) -> float:
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, env=_env(),
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _heaviest_imports(top: int = 10) -> list:
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=_env(),
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if parts[0].isdigit():
+            rows.append((int(parts[1]), parts[2]))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": us / 1000} for us, name in rows[:top]]
+
+
+def _has_display() -> bool:
+    if sys.platform.startswith("win") or sys.platform == "darwin":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args(argv)
+
+    import_ms = [_sample(_IMPORT_SNIPPET) for _ in range(args.runs)]
+    result = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_ms_median": statistics.median(import_ms),
+        "import_ms": import_ms,
+        "heaviest_imports": _heaviest_imports(),
+    }
+    if _has_display():
+        window_ms = [_sample(_WINDOW_SNIPPET) for _ in range(args.runs)]
+        result["window_ms_median"] = statistics.median(window_ms)
+        result["window_ms"] = window_ms
+
+    print(f"import app:       {result['import_ms_median']:.1f} ms (median of {args.runs})")
+    if "window_ms_median" in result:
+        print(f"window on screen: {result['window_ms_median']:.1f} ms (median of {args.runs})")
+    else:
+        print("window on screen: skipped (no display)")
+    print("heaviest imports (cumulative):")
+    for row in result["heaviest_imports"]:
+        print(f"  {row['cumulative_ms']:8.1f} ms  {row['module']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if args.max_import_ms is not None and result["import_ms_median"] > args.max_import_ms:
+        print(f"❌ median import time {result['import_ms_median']:.1f} ms exceeds {args.max_import_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
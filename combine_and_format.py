@@ -8,7 +8,15 @@ from openpyxl.utils import get_column_letter
 
 def load_excel_file_task(file_info):
     """Load a single Excel file - used for parallel processing"""
-    path, sheet_name, header, columns, name = file_info
+    path, sheet_name, header, columns, name, source = file_info
+    # Sheet and header row from the file's first rows; the defaults are the usual export layout
+    from services.source_sniffer import locate_header, SOURCE_SIGNATURES
+    found = locate_header(path, SOURCE_SIGNATURES[source])
+    if found is not None:
+        sheet_name, header = found["sheet"], found["header"]
+    else:
+        print(f"⚠️ {source} columns not found in the first rows of {os.path.basename(path)}; "
+              f"using sheet '{sheet_name}', header row {header}")
     df = pd.read_excel(path, sheet_name=sheet_name, header=header)
     if columns:
         df = df[columns]
@@ -17,13 +25,13 @@ def load_excel_file_task(file_info):
 def combine_and_format(expense_etd_path=None, ee_active_path=None, expense_cf_path=None, expense_ppsa_path=None, request_rit_path=None):
     from concurrent.futures import ProcessPoolExecutor
     
-    # Define file loading tasks
+    # Define file loading tasks: (path, default sheet, default header row, columns, name, source)
     file_tasks = [
-        (expense_etd_path or "./data/CombineAndFormatData/Expense - Expense Type Detail (SLO) 2024.xlsx", "Details_1", 8, None, "expense_etd"),
-        (ee_active_path or "./data/CombineAndFormatData/EE Active.xlsx", "EE-Active", 0, ["Emplid", "Empl Status Pay Ldescr", "Division", "Deptid Ldescr", "Position Ldescr"], "employee_active"),
-        (expense_cf_path or "./data/CombineAndFormatData/Expense - Expense Reports with CF Information and Comments (2).xlsx", "Summary_1", 6, ["Report Key", "Request ID and Destination", "Total Approved Amount (rpt)", "Processor Approval Date"], "expense_cf"),
-        (expense_ppsa_path or "./data/CombineAndFormatData/Expense - Processor Paid Summary Account.xlsx", "Page1_1", 4, ["Sent for Payment Date", "Paid Date", "Report Key", "Transaction Date", "Expense Type", "Approved Amount"], "expense_ppsa"),
-        (request_rit_path or "./data/CombineAndFormatData/Request - Risk International Travel with Header Comments (1).xlsx", "Request - Risk International_1", 7, ["Request ID", "Authorized Date", "Destination City/Location", "Destination Country"], "request_rit")
+        (expense_etd_path or "./data/CombineAndFormatData/Expense - Expense Type Detail (SLO) 2024.xlsx", "Details_1", 8, None, "expense_etd", "Expense Type Detail"),
+        (ee_active_path or "./data/CombineAndFormatData/EE Active.xlsx", "EE-Active", 0, ["Emplid", "Empl Status Pay Ldescr", "Division", "Deptid Ldescr", "Position Ldescr"], "employee_active", "EE Active"),
+        (expense_cf_path or "./data/CombineAndFormatData/Expense - Expense Reports with CF Information and Comments (2).xlsx", "Summary_1", 6, ["Report Key", "Request ID and Destination", "Total Approved Amount (rpt)", "Processor Approval Date"], "expense_cf", "CF Information"),
+        (expense_ppsa_path or "./data/CombineAndFormatData/Expense - Processor Paid Summary Account.xlsx", "Page1_1", 4, ["Sent for Payment Date", "Paid Date", "Report Key", "Transaction Date", "Expense Type", "Approved Amount"], "expense_ppsa", "Processor Paid Summary"),
+        (request_rit_path or "./data/CombineAndFormatData/Request - Risk International Travel with Header Comments (1).xlsx", "Request - Risk International_1", 7, ["Request ID", "Authorized Date", "Destination City/Location", "Destination Country"], "request_rit", "Risk International Travel")
     ]
     
     # Load all files in parallel using processes
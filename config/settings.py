@@ -3,11 +3,99 @@ from pathlib import Path
 # Project root (parent of /config)
 BASE_DIR = Path(__file__).resolve().parents[1]
 REPORTS_DIR = BASE_DIR / "audit_reports"
-REPORTS_DIR.mkdir(exist_ok=True)
-
 POLICIES_DIR = BASE_DIR / "config" / "policies"
-POLICIES_DIR.mkdir(exist_ok=True)
 
 # Optional defaults
 DEFAULT_POLICY_FILE = POLICIES_DIR / "policy_rules.txt"  # you’ll create this file
 MAX_POLICY_CHARS = 12000  # trim to protect token budget
+
+# Per-group model responses: "txt" writes one file per group into REPORTS_DIR,
+# "archive" appends them to a single compressed SQLite archive (see services/report_archive.py)
+REPORT_OUTPUT_MODE = "txt"
+REPORT_ARCHIVE_PATH = REPORTS_DIR / "audit_responses.sqlite"
+
+# Every run's audited lines (flag, reason, policy version) are appended to this store for
+# cross-run history: repeat offenders and trends over all runs (services/results_store.py)
+RESULTS_STORE = True
+RESULTS_STORE_PATH = REPORTS_DIR / "audit_results.sqlite"
+
+# Save each pipeline stage (merged, original, clean, flagged frames + audit results) under
+# ARTIFACTS_DIR/<run_id>/ so a stage can be re-run without the earlier ones (services/artifacts.py)
+PERSIST_ARTIFACTS = False
+ARTIFACTS_DIR = REPORTS_DIR / "artifacts"
+
+# Optional: convert the cleaned expense frame to categorical/datetime64/float64 dtypes (services/io_loader.py).
+# Roughly halves its memory; key columns become categoricals, so groupby/merge code must pass observed=True
+COMPACT_DTYPES = False
+
+# Group selection for the LLM audit: "risk" audits the highest-scoring groups first
+# (services/prioritizer.py), "random" keeps the old random sample
+AUDIT_ORDER = "risk"
+AUDIT_DEADLINE_S = None  # stop dispatching new groups after this many seconds (None = no limit)
+PRIORITY_WEIGHTS = {"amount": 1.0, "international": 0.5, "inactive": 0.75, "late": 0.5}
+LATE_SUBMISSION_DAYS = 60  # submission gap at which the "late" feature saturates
+
+# Cross-report duplicate / split-transaction detector (services/duplicate_detector.py)
+DETECT_DUPLICATES = True
+DUPLICATE_WINDOW_DAYS = 3   # same employee/vendor/amount on different reports within N days
+SPLIT_WINDOW_DAYS = 2       # under-cap charges from one vendor summed over N days (meals: one day, per MEAL_DAILY_CAP)
+RECEIPT_THRESHOLD = 75.0    # receipts required at/above this amount
+MEAL_DAILY_CAP = 79.0
+# Expense types that legitimately recur daily/per trip leg or are shared group charges; never treated as
+# splits (case-insensitive substrings)
+SPLIT_EXCLUDED_TYPES = ["lodging", "accommodation", "group meal", "parking", "fuel", "per diem", "mileage",
+                        "ground transportation", "airline fees", "baggage"]
+
+# Reuse verdicts between structurally identical groups (services/verdict_cache.py);
+# this share of the repeats is audited anyway to spot-check the reuse
+VERDICT_CACHE = True
+VERDICT_SPOT_CHECK_RATE = 0.1
+
+# Model tiering: SCREENING_MODEL_ID screens every group and states a confidence; groups it flags
+# (ESCALATE_FLAGGED) or is less than ESCALATION_CONFIDENCE sure about are re-audited with AUDIT_MODEL_ID.
+# TIERED_AUDIT = False sends every group straight to AUDIT_MODEL_ID
+TIERED_AUDIT = True
+SCREENING_MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+AUDIT_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+ESCALATION_CONFIDENCE = 0.8
+ESCALATE_FLAGGED = True
+
+# Sharded execution (services/work_queue.py): with AUDIT_WORK_QUEUE the audit enqueues its groups in
+# WORK_QUEUE_PATH and waits for them; `python -m services.work_queue` workers on this or other hosts
+# (sharing that file) consume them, and this process works the queue with WORK_QUEUE_LOCAL_THREADS too
+AUDIT_WORK_QUEUE = False
+WORK_QUEUE_PATH = REPORTS_DIR / "work_queue.sqlite"
+WORK_QUEUE_SHARDS = 8           # groups are sharded by Report Key hash
+WORK_QUEUE_LEASE_S = 600        # a claimed task not finished after this long is handed out again
+WORK_QUEUE_LOCAL_THREADS = 8    # 0 = the coordinator only waits for external workers
+BEDROCK_MAX_RPS = None          # global Bedrock request rate across all queue workers (None = unlimited)
+
+# Bedrock endpoints the client pool spreads calls over (services/bedrock_client.py). Per endpoint:
+# "region", optional "endpoint_url" (e.g. a local stub), "model_ids" ({requested id: id served there,
+# e.g. a regional inference profile}) and "max_rps" (that endpoint's quota)
+BEDROCK_ENDPOINTS = [
+    {"region": "us-west-2"},
+]
+BEDROCK_COOLDOWN_S = 5      # a throttled/unreachable endpoint is skipped this long (doubling, up to 8x)
+BEDROCK_MAX_ATTEMPTS = 6    # endpoints tried per call before the error is raised
+
+# In-flight Bedrock requests per audit (services/concurrency.py): an AIMD window driven by throttling,
+# errors and time-to-first-token. ADAPTIVE_CONCURRENCY = False uses a fixed ADAPTIVE_MAX_INFLIGHT
+ADAPTIVE_CONCURRENCY = True
+ADAPTIVE_INITIAL_INFLIGHT = 8
+ADAPTIVE_MIN_INFLIGHT = 1
+ADAPTIVE_MAX_INFLIGHT = 64
+ADAPTIVE_LATENCY_FACTOR = 2.0   # smoothed TTFT above this multiple of the best seen counts as congestion
+THROTTLE_RETRIES = 4            # retries of a throttled group (after the window shrinks)
+
+# Report stage (services/report_writer.py): the audited, violations and exceptions workbooks are written
+# concurrently by REPORT_WORKERS processes (1 = one after another in this process).
+# REPORT_SINGLE_WORKBOOK writes them as sheets of one Audit_Report_<timestamp>.xlsx instead
+REPORT_WORKERS = 3
+REPORT_SINGLE_WORKBOOK = False
+
+
+def ensure_reports_dir() -> Path:
+    """Creates REPORTS_DIR on first write (kept out of import time to keep start-up cheap)."""
+    REPORTS_DIR.mkdir(exist_ok=True)
+    return REPORTS_DIR
@@ -0,0 +1,176 @@
+# services/artifacts.py
+"""
+Per-run stage outputs, so pipeline stages can be re-run without the ones before them.
+
+    ARTIFACTS_DIR/<run_id>/merged.arrow     combine_and_format output (master reports)
+                          /original.arrow   clean_data_sheet outputs
+                          /clean.arrow
+                          /flagged.arrow    audited subset with 'Audit Flag'
+                          /audit_results.json
+
+Frames are written as uncompressed Arrow IPC (Feather v2) files and read back memory-mapped,
+so several processes reading the same stage share one copy in the page cache. pyarrow is
+optional: without it the stage is pickled instead, and columns Arrow can't represent (mixed
+numbers and text) are pickled next to the Arrow file.
+
+    python -m services.artifacts list
+    python -m services.artifacts rerender [RUN_ID]   # reports only, from flagged + audit results
+    python -m services.artifacts reaudit [RUN_ID]    # new audit from the saved original + clean frames
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from config.settings import ARTIFACTS_DIR
+
+AUDIT_RESULTS_FILE = "audit_results.json"
+
+
+def run_dir(run_id: str) -> Path:
+    return ARTIFACTS_DIR / str(run_id)
+
+
+def _stage_path(run_id: str, stage: str) -> Optional[Path]:
+    for suffix in (".arrow", ".pkl"):
+        path = run_dir(run_id) / f"{stage}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def has_stage(run_id: str, stage: str) -> bool:
+    return _stage_path(run_id, stage) is not None
+
+
+def _arrow_unsafe_columns(df: pd.DataFrame) -> List[str]:
+    """Columns Arrow can't hold as one type (e.g. object/categorical columns mixing numbers and text)."""
+    import pyarrow as pa
+    bad = []
+    for col in df.columns:
+        try:
+            pa.Table.from_pandas(df[[col]], preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            bad.append(col)
+    return bad
+
+
+def save_frame(df: pd.DataFrame, run_id: str, stage: str) -> str:
+    """
+    Writes one stage's frame (index and dtypes included). Returns the file path.
+    Columns Arrow can't represent go to a small <stage>.extra.pkl next to the Arrow file.
+    """
+    out_dir = run_dir(run_id)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        import pyarrow as pa
+        from pyarrow import feather
+    except ImportError:
+        path = out_dir / f"{stage}.pkl"
+        df.to_pickle(path)
+        return str(path)
+
+    path = out_dir / f"{stage}.arrow"
+    extra_path = out_dir / f"{stage}.extra.pkl"
+    extra_path.unlink(missing_ok=True)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=None)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        bad = _arrow_unsafe_columns(df)
+        pd.to_pickle({"columns": list(df.columns), "frame": df[bad]}, extra_path)
+        table = pa.Table.from_pandas(df.drop(columns=bad), preserve_index=None)
+    # uncompressed: compressed buffers can't be memory-mapped without a copy
+    feather.write_feather(table, str(path), compression="uncompressed")
+    return str(path)
+
+
+def load_frame(run_id: str, stage: str, memory_map: bool = True) -> pd.DataFrame:
+    """Reads a stage saved by save_frame (memory-mapped for Arrow files)."""
+    path = _stage_path(run_id, stage)
+    if path is None:
+        raise FileNotFoundError(f"No '{stage}' artifact for run {run_id} in {run_dir(run_id)}")
+    if path.suffix == ".pkl":
+        return pd.read_pickle(path)
+    from pyarrow import feather
+    df = feather.read_table(str(path), memory_map=memory_map).to_pandas()
+    extra_path = path.with_name(f"{stage}.extra.pkl")
+    if extra_path.exists():
+        extra = pd.read_pickle(extra_path)
+        df = pd.concat([df, extra["frame"].set_axis(df.index)], axis=1)[extra["columns"]]
+    return df
+
+
+def save_audit_results(run_id: str, audit_results: list) -> str:
+    path = run_dir(run_id) / AUDIT_RESULTS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(audit_results, default=str), encoding="utf-8")
+    return str(path)
+
+
+def load_audit_results(run_id: str) -> list:
+    return json.loads((run_dir(run_id) / AUDIT_RESULTS_FILE).read_text(encoding="utf-8"))
+
+
+def list_runs() -> List[dict]:
+    """Saved runs, oldest first, with the stages available for each."""
+    if not ARTIFACTS_DIR.exists():
+        return []
+    runs = []
+    for d in sorted(p for p in ARTIFACTS_DIR.iterdir() if p.is_dir()):
+        stages = sorted({p.stem for p in d.iterdir()
+                         if p.suffix in (".arrow", ".pkl") and not p.name.endswith(".extra.pkl")})
+        runs.append({"run_id": d.name, "stages": stages, "audited": (d / AUDIT_RESULTS_FILE).exists()})
+    return runs
+
+
+def latest_run(stage: str) -> Optional[str]:
+    """Most recent run ID (IDs sort by time) that has `stage`."""
+    runs = [r["run_id"] for r in list_runs() if stage in r["stages"]]
+    return runs[-1] if runs else None
+
+
+def rerender(run_id: Optional[str] = None) -> str:
+    """Re-runs only the report stage of a saved run. Returns the audited workbook path."""
+    from services.report_writer import write_reports
+    run_id = run_id or latest_run("flagged")
+    if run_id is None:
+        raise FileNotFoundError(f"No audited run saved in {ARTIFACTS_DIR}")
+    print(f"🖨️ Re-rendering reports of run {run_id}")
+    return write_reports(load_frame(run_id, "original"), load_frame(run_id, "flagged"), load_audit_results(run_id))
+
+
+def reaudit(run_id: Optional[str] = None, bedrock_runtime=None) -> pd.DataFrame:
+    """Audits the saved original/clean frames of a run again (as a new run), skipping ingest."""
+    from services.report_writer import audit_and_flag
+    run_id = run_id or latest_run("clean")
+    if run_id is None:
+        raise FileNotFoundError(f"No cleaned frame saved in {ARTIFACTS_DIR}")
+    if bedrock_runtime is None:
+        from services.bedrock_client import init_bedrock_runtime
+        bedrock_runtime = init_bedrock_runtime()
+    print(f"🔁 Re-auditing the data of run {run_id}")
+    return audit_and_flag(load_frame(run_id, "original"), load_frame(run_id, "clean"), bedrock_runtime,
+                          persist=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Re-run pipeline stages from saved artifacts.")
+    parser.add_argument("command", choices=["list", "rerender", "reaudit"])
+    parser.add_argument("run_id", nargs="?", help="Run to use (default: the latest one with the needed stage)")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for run in list_runs():
+            print(f"{run['run_id']}  stages={','.join(run['stages'])}  audited={'yes' if run['audited'] else 'no'}")
+    elif args.command == "rerender":
+        rerender(args.run_id)
+    else:
+        reaudit(args.run_id)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
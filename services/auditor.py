@@ -1,16 +1,33 @@
 import json
 import random
 import os
+import time
+import uuid
+import pandas as pd
+from datetime import datetime
 from typing import Optional
 from services.prompt_builder import *
-from config.settings import REPORTS_DIR
+from config.settings import (REPORT_OUTPUT_MODE, AUDIT_ORDER, AUDIT_DEADLINE_S, VERDICT_CACHE,
+                             VERDICT_SPOT_CHECK_RATE, AUDIT_WORK_QUEUE, WORK_QUEUE_LOCAL_THREADS,
+                             TIERED_AUDIT, SCREENING_MODEL_ID, AUDIT_MODEL_ID, ESCALATION_CONFIDENCE,
+                             ESCALATE_FLAGGED, THROTTLE_RETRIES, ensure_reports_dir)
+from services.report_archive import append_response
 from services.policy_loader import load_policy_text
 from config.settings import DEFAULT_POLICY_FILE  # optiona
 
-def invoke_claude_model(prompt: str, bedrock_runtime) -> str:
+def new_run_id() -> str:
+    """Timestamp (same format as the report file names) plus a short random suffix."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def invoke_claude_model(prompt: str, bedrock_runtime, model_id: Optional[str] = None,
+                        call_stats: Optional[dict] = None) -> str:
     """
-    Sends a prompt to Claude 3 Sonnet via Amazon Bedrock and returns the full streamed response text.
+    Sends a prompt to Claude via Amazon Bedrock (model_id, default settings.AUDIT_MODEL_ID)
+    and returns the full streamed response text.
+    If call_stats is given, the time to first token (s) of this call is stored under "ttft".
     """
+    started = time.monotonic()
 
     response = bedrock_runtime.invoke_model_with_response_stream(
         body=json.dumps({
@@ -21,7 +38,7 @@ def invoke_claude_model(prompt: str, bedrock_runtime) -> str:
             "max_tokens": 1024,
             "temperature": 0.5,
         }),
-        modelId="anthropic.claude-3-sonnet-20240229-v1:0",  # full Claude 3 model ID
+        modelId=model_id or AUDIT_MODEL_ID,
         accept="application/json",
         contentType="application/json"
     )
@@ -30,6 +47,8 @@ def invoke_claude_model(prompt: str, bedrock_runtime) -> str:
     full_response = ""
 
     for event in response_body:
+        if call_stats is not None and "ttft" not in call_stats:
+            call_stats["ttft"] = time.monotonic() - started
         if "chunk" in event:
             chunk_data = json.loads(event["chunk"]["bytes"].decode())
 
@@ -75,10 +94,11 @@ def extract_violation_exception_rows(text: str):
         start = m.end()
         # Take the next ~1200 chars (enough for a few bullets)
         chunk = text[start:start+1200]
-        # Extract all "Row 123" and also plain numbers in comma lists
-        nums = set(int(n) for n in re.findall(r"\bRow\s+(\d+)\b", chunk, flags=re.IGNORECASE))
-        # plus numbers in lists like "Row 1, 2, 3" or "1, 2, 3" right under the section
-        nums.update(int(n) for n in re.findall(r"\b(\d{1,7})\b", chunk) if len(n) <= 7)
+        # Extract all "Row 3" / "Row ID 3" / "Rows 1, 2 and 3". Bare numbers are not taken: with
+        # short Row IDs they would collide with amounts and dates in the text
+        nums = set()
+        for m in re.finditer(r"\bRows?(?:\s+IDs?)?\s*#?\s*(\d+(?:\s*(?:,|and|&)\s*\d+)*)", chunk, flags=re.IGNORECASE):
+            nums.update(int(n) for n in re.findall(r"\d+", m.group(1)))
         return sorted(nums)
 
     viol2 = rows_from_section("Violations")
@@ -86,26 +106,106 @@ def extract_violation_exception_rows(text: str):
     return viol2, exce2
 
 
+def extract_confidence(text: str) -> Optional[float]:
+    """'Confidence: 0.85' (or '85%') from a screening response, as 0..1; None if missing."""
+    m = re.search(r"confidence\s*[:\-]\s*(\d+(?:\.\d+)?)\s*(%?)", text, flags=re.IGNORECASE)
+    if not m:
+        return None
+    value = float(m.group(1))
+    if m.group(2) or value > 1:
+        value /= 100
+    return min(max(value, 0.0), 1.0)
 
-def audit_single_employee(employee_id, report_key, df_emp, bedrock_runtime, policy_path: Optional[str] = None):
-    """Audit a single employee group - used for parallel processing"""
-    print(f"\n🔍 Auditing Employee: {employee_id}, Report Key: {report_key}")
 
-    constant_fields, csv_data = format_employee_expenses_as_csv(df_emp)
-    policy_text = load_policy_text(policy_path or str(DEFAULT_POLICY_FILE))
-    prompt = create_audit_prompt(constant_fields, csv_data, policy_text=policy_text)
 
-    full_response = invoke_claude_model(prompt, bedrock_runtime)
-    print("✅ Audit Result received")
+def map_local_rows(local_ids, row_map):
+    """
+    Maps the model's Row IDs (1..n within one group) to 'Original Row' values via row_map.
+    IDs outside the group are returned separately and never flagged. Returns (rows, rejected).
+    """
+    rows, rejected = [], []
+    for i in dict.fromkeys(local_ids):
+        if 1 <= i <= len(row_map):
+            rows.append(row_map[i - 1])
+        else:
+            rejected.append(i)
+    return rows, rejected
+
+
+def row_id_legend(row_map) -> str:
+    """Footer appended to saved responses so readers can map Row IDs back to 'Original Row'."""
+    pairs = ", ".join(f"{i}={r}" for i, r in enumerate(row_map, start=1))
+    return f"\n\n[Row ID = Original Row: {pairs}]"
+
+
+def save_group_response(employee_id, report_key, full_response: str,
+                        run_id: Optional[str] = None, output_mode: Optional[str] = None) -> str:
+    """
+    Persists one group's model response, either as a .txt in REPORTS_DIR or appended
+    to the response archive (REPORT_OUTPUT_MODE = "archive"). Returns where it went.
+    """
+    if (output_mode or REPORT_OUTPUT_MODE) == "archive":
+        return append_response(run_id or new_run_id(), employee_id, report_key, full_response)
 
     # write .txt next to Excel outputs (project_root/audit_reports)
     filename = f"Report Employee ID-{employee_id} Report Key-{report_key}.txt"
-    filepath = REPORTS_DIR / filename
+    filepath = ensure_reports_dir() / filename
     with open(filepath, "w", encoding="utf-8") as f:
         f.write(full_response)
-    print(f"📝 Saved model response to: {filepath}")
+    return str(filepath)
 
-    violation_rows, exception_rows = extract_violation_exception_rows(full_response)
+
+def audit_single_employee(employee_id, report_key, df_emp, bedrock_runtime, policy_path: Optional[str] = None,
+                          run_id: Optional[str] = None, output_mode: Optional[str] = None,
+                          findings_text: str = "", call_stats: Optional[dict] = None):
+    """
+    Audit a single employee group - used for parallel processing.
+    With TIERED_AUDIT the screening model answers first; the group is escalated to AUDIT_MODEL_ID
+    when the screen flags rows or its confidence is below ESCALATION_CONFIDENCE.
+    call_stats receives the time to first token of the first model call ("ttft").
+    """
+    print(f"\n🔍 Auditing Employee: {employee_id}, Report Key: {report_key}")
+
+    # The model sees short per-group Row IDs (1..n); row_map turns them back into 'Original Row'
+    row_map = [int(r) for r in df_emp["Original Row"]]
+    df_prompt = df_emp.drop(columns=["Original Row"])
+    df_prompt.insert(0, ROW_ID_COLUMN, range(1, len(df_prompt) + 1))
+    constant_fields, csv_data = format_employee_expenses_as_csv(df_prompt)
+    policy_text = load_policy_text(policy_path or str(DEFAULT_POLICY_FILE))
+
+    confidence, escalation = None, None
+    if TIERED_AUDIT:
+        screen_prompt = create_audit_prompt(constant_fields, csv_data, policy_text=policy_text,
+                                            findings_text=findings_text, ask_confidence=True)
+        screen_response = invoke_claude_model(screen_prompt, bedrock_runtime, model_id=SCREENING_MODEL_ID,
+                                              call_stats=call_stats)
+        confidence = extract_confidence(screen_response)
+        if confidence is None or confidence < ESCALATION_CONFIDENCE:
+            escalation = "low_confidence"
+        elif ESCALATE_FLAGGED and any(map_local_rows(ids, row_map)[0]
+                                      for ids in extract_violation_exception_rows(screen_response)):
+            escalation = "flagged"
+
+    if TIERED_AUDIT and escalation is None:
+        full_response, model_id = screen_response, SCREENING_MODEL_ID
+    else:
+        if escalation:
+            print(f"⬆️ Escalating Employee {employee_id}, Report Key {report_key} ({escalation.replace('_', ' ')})")
+        prompt = create_audit_prompt(constant_fields, csv_data, policy_text=policy_text, findings_text=findings_text)
+        model_id = AUDIT_MODEL_ID
+        full_response = invoke_claude_model(prompt, bedrock_runtime, model_id=model_id, call_stats=call_stats)
+    print("✅ Audit Result received")
+
+    saved_to = save_group_response(employee_id, report_key, full_response + row_id_legend(row_map),
+                                   run_id=run_id, output_mode=output_mode)
+    print(f"📝 Saved model response to: {saved_to}")
+
+    violation_ids, exception_ids = extract_violation_exception_rows(full_response)
+    violation_rows, rejected_v = map_local_rows(violation_ids, row_map)
+    exception_rows, rejected_e = map_local_rows(exception_ids, row_map)
+    if rejected_v or rejected_e:
+        print(f"⚠️ Ignored Row IDs outside Employee {employee_id}, Report Key {report_key}: "
+              f"{sorted(set(rejected_v + rejected_e))}")
 
     return {
         "employee_id": employee_id,
@@ -113,42 +213,295 @@ def audit_single_employee(employee_id, report_key, df_emp, bedrock_runtime, poli
         "response": full_response,
         "violation_rows": violation_rows,
         "exception_rows": exception_rows,
+        "model_id": model_id,
+        "confidence": confidence,
+        "escalation": escalation,
+        "row_map": row_map,
+        "rejected_ids": sorted(set(rejected_v + rejected_e)),
     }
 
 
 
-def run_audit_for_multiple_employees(df_clean, bedrock_runtime, group_count=5):
+def _record_failure(metrics, employee_id, report_key, error) -> None:
+    """Logs a group that could not be audited and records it under "failed_groups" in metrics."""
+    print(f"❌ Gave up on Employee {employee_id}, Report Key {report_key}: {error}")
+    if metrics is not None:
+        metrics.append("failed_groups", {"employee_id": employee_id, "report_key": report_key, "error": str(error)})
+
+
+def _dispatch(tasks, bedrock_runtime, run_id: str, output_mode: Optional[str], deadline_at: Optional[float],
+              controller=None, metrics=None):
     """
-    Processes a random sample of `group_count` employee-report groups using parallel processing.
-    Returns only the audited rows flagged and saved to Excel.
+    Audits tasks in a thread pool, starting them in list order, with as many in flight as the
+    controller's AIMD window allows (services/concurrency.py). Throttled groups shrink the window and
+    are retried up to THROTTLE_RETRIES times. A group that still fails is logged and recorded in
+    `metrics`; the others carry on. Tasks not started by `deadline_at` (time.monotonic())
+    are dropped. Returns [(task, result), ...] for completed tasks.
     """
     from concurrent.futures import ThreadPoolExecutor
+    from services.concurrency import AIMDController, is_throttle
 
-    groups = df_clean.groupby(['Employee ID', 'Report Key'])
-    group_keys = list(groups.groups.keys())
-    sampled_keys = random.sample(group_keys, min(group_count, len(group_keys)))
+    done = []
+    if not tasks:
+        return done
+    controller = controller or AIMDController.from_settings()
+    add_listener = getattr(bedrock_runtime, "add_listener", None)
+    if add_listener:
+        # the client pool retries throttles itself; it still has to shrink the window
+        add_listener(controller.on_throttle)
+
+    failed = []
+
+    def run(task):
+        if not controller.acquire(deadline_at):
+            return None
+        outcome, stats = "error", {}
+        try:
+            for attempt in range(THROTTLE_RETRIES + 1):
+                stats = {}
+                try:
+                    result = audit_single_employee(task["employee_id"], task["report_key"], task["df_emp"],
+                                                   bedrock_runtime, run_id=run_id, output_mode=output_mode,
+                                                   findings_text=task["findings_text"], call_stats=stats)
+                    outcome = "ok"
+                    return result
+                except Exception as e:
+                    if not is_throttle(e) or attempt == THROTTLE_RETRIES:
+                        # one failed group must not lose the results of the others
+                        failed.append(task)
+                        _record_failure(metrics, task["employee_id"], task["report_key"], e)
+                        return None
+                    if not add_listener:
+                        # with a client pool its listener has already counted this throttle
+                        controller.on_throttle()
+                    time.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.0))
+        finally:
+            controller.release(outcome, stats.get("ttft"))
+
+    try:
+        with ThreadPoolExecutor(max_workers=int(controller.max_window)) as executor:
+            futures = [executor.submit(run, t) for t in tasks]
+            for task, future in zip(tasks, futures):
+                result = future.result()
+                if result is not None:
+                    done.append((task, result))
+    finally:
+        if add_listener:
+            bedrock_runtime.remove_listener(controller.on_throttle)
+    skipped = len(tasks) - len(done) - len(failed)
+    if skipped:
+        print(f"⏱️ Audit deadline reached; skipped {skipped} queued groups")
+    print(f"🎚️ In-flight window {controller.window:.1f} (peak {controller.peak_window:.1f}, "
+          f"{controller.throttles} throttles)")
+    return done
+
+
+def _dispatch_queue(tasks, work_queue, bedrock_runtime, run_id: str, deadline_at: Optional[float], metrics=None):
+    """
+    Same contract as _dispatch, but through a shared WorkQueue: enqueues the tasks, works the queue
+    with WORK_QUEUE_LOCAL_THREADS local threads (if bedrock_runtime is given) and blocks until every
+    task is done or failed. External workers write their results into the same queue.
+    """
+    import threading
+    from services.work_queue import run_worker
+
+    if not tasks:
+        return []
+    task_ids = work_queue.enqueue(run_id, tasks)
+    print(f"📬 Enqueued {len(task_ids)} groups for run {run_id}")
+
+    stop = threading.Event()
+    local = None
+    if bedrock_runtime is not None and WORK_QUEUE_LOCAL_THREADS:
+        local = threading.Thread(target=run_worker, daemon=True,
+                                 kwargs={"queue": work_queue, "bedrock_runtime": bedrock_runtime, "run_id": run_id,
+                                         "threads": WORK_QUEUE_LOCAL_THREADS, "idle_exit_s": None,
+                                         "stop_event": stop})
+        local.start()
+
+    while work_queue.outstanding(run_id):
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            dropped = work_queue.cancel_queued(run_id)
+            print(f"⏱️ Audit deadline reached; skipped {dropped} queued groups")
+            deadline_at = None
+        time.sleep(0.5)
+    stop.set()
+    if local is not None:
+        local.join()
+
+    for employee_id, report_key, error in work_queue.failures(run_id):
+        _record_failure(metrics, employee_id, report_key, error)
+
+    results = work_queue.results(run_id)
+    done = []
+    for task, task_id in zip(tasks, task_ids):
+        if task_id in results:
+            # keep the caller's key types (the queue stores them as text)
+            result = {**results[task_id], "employee_id": task["employee_id"], "report_key": task["report_key"]}
+            done.append((task, result))
+    return done
+
+
+def run_audit_for_multiple_employees(df_clean, bedrock_runtime, group_count=5,
+                                     run_id: Optional[str] = None, output_mode: Optional[str] = None,
+                                     order: Optional[str] = None, deadline_s: Optional[float] = None,
+                                     findings=None, verdict_cache=None, work_queue=None, metrics=None):
+    """
+    Processes `group_count` employee-report groups (all if None) using parallel processing.
+    order="risk" (default: settings.AUDIT_ORDER) dispatches the highest risk-scored groups first;
+    order="random" audits a random sample. With `deadline_s`, groups not started by then are dropped.
+    `findings` (from services.duplicate_detector) are quoted in the prompt of the groups they touch.
+    Groups identical to an already audited one (services.verdict_cache) reuse its verdict, except a
+    VERDICT_SPOT_CHECK_RATE sample that is audited anyway; pass `verdict_cache` to share it across runs.
+    With `work_queue` (a services.work_queue.WorkQueue, or True for settings.WORK_QUEUE_PATH; default
+    settings.AUDIT_WORK_QUEUE) groups are sharded through the queue and this call returns once all are done.
+    Run figures (coverage, reuse, escalation rates) are recorded in `metrics` (a RunMetrics) if given.
+    Returns only the audited rows flagged and saved to Excel.
+    All responses of one call share `run_id` (generated if not given).
+    """
+    from services.prioritizer import score_groups, select_groups, dollar_coverage
+    from services.duplicate_detector import findings_by_row
+    from services.verdict_cache import VerdictCache, group_signatures
+    from services.run_metrics import RunMetrics
+    from services.concurrency import AIMDController
+
+    run_id = run_id or new_run_id()
+    metrics = metrics if metrics is not None else RunMetrics(run_id)
+    order = order or AUDIT_ORDER
+    deadline_s = AUDIT_DEADLINE_S if deadline_s is None else deadline_s
+    deadline_at = None if deadline_s is None else time.monotonic() + deadline_s
+    cache = verdict_cache if verdict_cache is not None else (VerdictCache() if VERDICT_CACHE else None)
+    work_queue = AUDIT_WORK_QUEUE if work_queue is None else work_queue
+    if work_queue is True:
+        from services.work_queue import SQLiteWorkQueue
+        work_queue = SQLiteWorkQueue()
+
+    # one window for all waves of this run, so wave 2 starts at what wave 1 learned
+    controller = AIMDController.from_settings()
+
+    def dispatch(wave):
+        if work_queue:
+            for task in wave:
+                task["output_mode"] = output_mode
+            return _dispatch_queue(wave, work_queue, bedrock_runtime, run_id, deadline_at, metrics=metrics)
+        return _dispatch(wave, bedrock_runtime, run_id, output_mode, deadline_at, controller=controller,
+                         metrics=metrics)
+
+    groups = df_clean.groupby(['Employee ID', 'Report Key'], observed=True)
+    scores = score_groups(df_clean)
+    if order == "random":
+        group_keys = list(groups.groups.keys())
+        n = len(group_keys) if group_count is None else min(group_count, len(group_keys))
+        sampled_keys = random.sample(group_keys, n)
+    else:
+        sampled_keys = select_groups(scores, group_count)
+
+    row_findings = findings_by_row(findings)
+    tasks = []
+    for employee_id, report_key in sampled_keys:
+        df_emp = groups.get_group((employee_id, report_key))
+        # quoted with the group's Row IDs, the numbering the model sees
+        findings_text = "\n".join(
+            f"- Row {i}: {row_findings[int(r)]}"
+            for i, r in enumerate(df_emp["Original Row"], start=1) if int(r) in row_findings
+        )
+        tasks.append({"employee_id": employee_id, "report_key": report_key, "df_emp": df_emp,
+                      "findings_text": findings_text, "signature": None})
+
+    # Wave 1: the first group of each signature plus a spot-check sample of the repeats;
+    # the remaining repeats wait for a verdict to reuse
+    first_wave, deferred, seen = tasks, [], set()
+    if cache is not None:
+        first_wave = []
+        # cross-report findings are specific to a group; never share such a group's verdict
+        shareable = [t for t in tasks if not t["findings_text"]]
+        signatures = group_signatures(pd.concat([t["df_emp"] for t in shareable])) if shareable else {}
+        for task in tasks:
+            if task["findings_text"]:
+                first_wave.append(task)
+                continue
+            task["signature"], task["canonical_rows"] = signatures[(task["employee_id"], task["report_key"])]
+            if task["signature"] not in seen and cache.get(task["signature"]) is None:
+                seen.add(task["signature"])
+                first_wave.append(task)
+            elif random.random() < VERDICT_SPOT_CHECK_RATE:
+                task["spot_check"] = True
+                first_wave.append(task)
+            else:
+                deferred.append(task)
+
+    completed = dispatch(first_wave)
+    if cache is not None:
+        for task, result in completed:
+            if task["signature"] and not task.get("spot_check"):
+                cache.put(task["signature"], task["canonical_rows"], result)
+        for task, result in completed:
+            if not task.get("spot_check"):
+                continue
+            if cache.get(task["signature"]) is None:
+                # its representative didn't finish (deadline) or the pattern is already untrusted
+                cache.put(task["signature"], task["canonical_rows"], result)
+            elif not cache.check(task["signature"], task["canonical_rows"], result):
+                print(f"⚠️ Spot-check disagrees with cached verdict for Employee {task['employee_id']}, "
+                      f"Report Key {task['report_key']}; auditing the rest of its pattern")
+
+        # Wave 2: reuse trusted verdicts, audit the rest for real
+        second_wave = []
+        for task in deferred:
+            reused = cache.reuse(task["signature"], task["employee_id"], task["report_key"], task["canonical_rows"])
+            if reused is None:
+                second_wave.append(task)
+                continue
+            save_group_response(task["employee_id"], task["report_key"],
+                                reused["response"] + row_id_legend(reused["row_map"]),
+                                run_id=run_id, output_mode=output_mode)
+            completed.append((task, reused))
+        completed += dispatch(second_wave)
+        print(f"♻️ Reused cached verdicts for {cache.reused} groups "
+              f"({cache.spot_checks} spot-checks, {cache.disagreements} disagreements)")
 
     results = []
     all_violation_rows = []
     all_exception_rows = []
+    for task, result in completed:
+        all_violation_rows.extend(result["violation_rows"])
+        all_exception_rows.extend(result["exception_rows"])
+        results.append({
+            "employee_id": result["employee_id"],
+            "report_key": result["report_key"],
+            "response": result["response"],
+            "run_id": run_id,
+            "reused_from": result.get("reused_from"),
+            "model_id": result.get("model_id"),
+            "confidence": result.get("confidence"),
+            "escalation": result.get("escalation"),
+            "row_map": result.get("row_map"),
+        })
+
+    audited_keys = [(r["employee_id"], r["report_key"]) for r in results]
+    coverage = dollar_coverage(scores, audited_keys)
+    print(f"💰 Audited {len(audited_keys)}/{len(scores)} groups covering {coverage:.0%} of the approved amount")
+
+    metrics.set("groups_total", len(scores))
+    metrics.set("groups_audited", len(audited_keys))
+    metrics.set("groups_failed", len(metrics.get("failed_groups", [])))
+    if controller.completed or controller.throttles:
+        metrics.set("concurrency", controller.summary())
+        metrics.set("concurrency_decisions", controller.decisions)
+    metrics.set("rejected_row_ids", sum(len(r.get("rejected_ids") or []) for _, r in completed))
+    metrics.set("dollar_coverage", round(coverage, 4))
+    if cache is not None:
+        metrics.set("verdicts_reused", cache.reused)
+        metrics.set("spot_checks", cache.spot_checks)
+        metrics.set("spot_check_disagreements", cache.disagreements)
+    model_audited = [r for r in results if not r["reused_from"]]
+    if TIERED_AUDIT and model_audited:
+        escalations = [r["escalation"] for r in model_audited if r["escalation"]]
+        metrics.set("screened", len(model_audited))
+        metrics.set("escalated", len(escalations))
+        metrics.set("escalated_low_confidence", escalations.count("low_confidence"))
+        metrics.set("escalated_flagged", escalations.count("flagged"))
+        metrics.set("escalation_rate", round(len(escalations) / len(model_audited), 4))
+        print(f"⬆️ Escalated {len(escalations)}/{len(model_audited)} screened groups to {AUDIT_MODEL_ID}")
 
-    # Use ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor(max_workers=32) as executor:
-        futures = []
-        for employee_id, report_key in sampled_keys:
-            df_emp = groups.get_group((employee_id, report_key))
-            future = executor.submit(audit_single_employee, employee_id, report_key, df_emp, bedrock_runtime)
-            futures.append(future)
-
-        # Collect results
-        for future in futures:
-            result = future.result()
-            all_violation_rows.extend(result["violation_rows"])
-            all_exception_rows.extend(result["exception_rows"])
-            results.append({
-                "employee_id": result["employee_id"],
-                "report_key": result["report_key"],
-                "response": result["response"]
-            })
-
-    return all_violation_rows, all_exception_rows, results
\ No newline at end of file
+    return all_violation_rows, all_exception_rows, results
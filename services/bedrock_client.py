@@ -1,13 +1,258 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError
+
+from config.settings import BEDROCK_ENDPOINTS, BEDROCK_COOLDOWN_S, BEDROCK_MAX_ATTEMPTS
+from services.concurrency import THROTTLE_ERROR_CODES
+
+# Error codes that mean "this endpoint is unavailable, try another one"; only THROTTLE_ERROR_CODES
+# (shared with the AIMD controller) are reported to listeners as "throttle"
+FAILOVER_CODES = THROTTLE_ERROR_CODES | {"ServiceUnavailableException", "ModelNotReadyException",
+                                         "InternalServerException"}
+# Error codes that mean "the session token ran out" (InvalidClientTokenId is a wrong key, not an expired one)
+EXPIRED_CODES = {"ExpiredTokenException", "ExpiredToken", "RequestExpired"}
+
+
+def config_file_credentials() -> Optional[dict]:
+    """
+    Credentials from config/config.py, re-read on every call so tokens pasted there mid-run are
+    picked up. None (use boto3's default, self-refreshing credential chain) when the file is missing.
+    """
+    import importlib
+    try:
+        import config.config as cfg
+        cfg = importlib.reload(cfg)
+    except ImportError:
+        return None
+    return {
+        "aws_access_key_id": cfg.aws_access_key_id,
+        "aws_secret_access_key": cfg.aws_secret_access_key,
+        "aws_session_token": getattr(cfg, "aws_session_token", None),
+    }
+
+
+class _Endpoint:
+    """One region/endpoint_url with its own client, health and quota bookkeeping."""
+
+    def __init__(self, spec: dict):
+        self.region = spec.get("region", "us-west-2")
+        self.endpoint_url = spec.get("endpoint_url")
+        self.model_ids = dict(spec.get("model_ids") or {})
+        self.max_rps = spec.get("max_rps")
+        self.name = spec.get("name") or self.endpoint_url or self.region
+        self.client = None
+        self.cooldown_until = 0.0
+        self.failures = 0          # consecutive throttles/errors, drives the cooldown backoff
+        self.next_slot = 0.0       # earliest start of the next call under max_rps
+        self.in_flight = 0
+        self.calls = self.throttles = self.errors = 0
+
+    def load(self) -> float:
+        return self.in_flight / (self.max_rps or 1.0)
+
+    def stats(self) -> dict:
+        return {"endpoint": self.name, "calls": self.calls, "throttles": self.throttles, "errors": self.errors,
+                "in_flight": self.in_flight, "cooling_s": round(max(0.0, self.cooldown_until - time.monotonic()), 1)}
+
+
+class _StreamSlot:
+    """
+    Response body wrapper that keeps the endpoint's in-flight slot taken until the event stream
+    has been read to the end, closed, or dropped by the caller.
+    """
+    _body = None
+    _done = True
+
+    def __init__(self, body, release: Callable[[], None]):
+        self._body = body
+        self._release = release
+        self._lock = threading.Lock()
+        self._done = False
+
+    def _finish(self) -> None:
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        self._release()
+
+    def __iter__(self):
+        try:
+            for event in self._body or ():
+                yield event
+        finally:
+            self._finish()
+
+    def close(self) -> None:
+        try:
+            close = getattr(self._body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish()
+
+    def __getattr__(self, name):
+        return getattr(self._body, name)
+
+    def __del__(self):
+        self._finish()
+
+
+class BedrockClientPool:
+    """
+    Drop-in for a bedrock-runtime client (invoke_model_with_response_stream) that spreads calls over
+    several endpoints (settings.BEDROCK_ENDPOINTS): least-loaded healthy endpoint first, per-endpoint
+    max_rps, throttled/unreachable endpoints cool down while the call is retried elsewhere, and expired
+    session tokens trigger a credential refresh and client rebuild.
+    A call counts as in flight on its endpoint until the caller has read or closed the response body.
+    Errors raised while the caller iterates a response stream are not retried here.
+    `call_gate()`, if set, is called (and may block) before every endpoint request, retries included.
+    """
+
+    def __init__(self, endpoints: Optional[List[dict]] = None,
+                 credentials_provider: Optional[Callable[[], Optional[dict]]] = None,
+                 client_factory: Optional[Callable] = None, cooldown_s: float = BEDROCK_COOLDOWN_S,
+                 max_attempts: int = BEDROCK_MAX_ATTEMPTS, call_gate: Optional[Callable[[], None]] = None):
+        self.endpoints = [_Endpoint(spec) for spec in (endpoints or BEDROCK_ENDPOINTS)]
+        if not self.endpoints:
+            raise ValueError("At least one Bedrock endpoint is required")
+        self.credentials_provider = credentials_provider or (lambda: None)
+        self.client_factory = client_factory or self._boto3_client
+        self.cooldown_s = cooldown_s
+        self.max_attempts = max_attempts
+        self.call_gate = call_gate
+        self.generation = 0
+        self.refreshes = 0
+        self._listeners: List[Callable] = []
+        self._lock = threading.Lock()
+        self._build_clients()
+
+    @staticmethod
+    def _boto3_client(endpoint: _Endpoint, credentials: Optional[dict]):
+        session = boto3.Session(region_name=endpoint.region, **(credentials or {}))
+        # no botocore-level retries: throttled calls are rerouted by the pool instead
+        return session.client("bedrock-runtime", endpoint_url=endpoint.endpoint_url,
+                              config=Config(retries={"mode": "standard", "total_max_attempts": 1}))
+
+    def _build_clients(self):
+        credentials = self.credentials_provider()
+        for ep in self.endpoints:
+            ep.client = self.client_factory(ep, credentials)
+
+    def refresh_credentials(self, seen_generation: Optional[int] = None) -> None:
+        """Rebuilds every client with fresh credentials (once per expiry, however many threads saw it)."""
+        with self._lock:
+            if seen_generation is not None and seen_generation != self.generation:
+                return
+            print("🔑 Bedrock credentials expired; refreshing")
+            self._build_clients()
+            self.generation += 1
+            self.refreshes += 1
+
+    def add_listener(self, listener: Callable) -> None:
+        """listener(event, endpoint_name) is called on every "throttle" an endpoint returns."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _acquire(self, tried: set) -> _Endpoint:
+        """Reserves the best endpoint, waiting out cooldowns and max_rps spacing."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                healthy = [ep for ep in self.endpoints if ep.cooldown_until <= now]
+                if healthy:
+                    fresh = [ep for ep in healthy if ep.name not in tried] or healthy
+                    ep = min(fresh, key=lambda e: (max(e.next_slot - now, 0.0), e.load()))
+                    start = max(ep.next_slot, now)
+                    if ep.max_rps:
+                        ep.next_slot = start + 1.0 / ep.max_rps
+                    ep.in_flight += 1
+                    wait = start - now
+                    break
+                wait_cooldown = min(ep.cooldown_until for ep in self.endpoints) - now
+            time.sleep(max(wait_cooldown, 0.01))
+        if wait > 0:
+            time.sleep(wait)
+        return ep
+
+    def _release(self, ep: _Endpoint) -> None:
+        with self._lock:
+            ep.in_flight -= 1
+
+    def _call(self, ep: _Endpoint, call: dict) -> dict:
+        """Invokes ep. On success its slot stays taken until the returned body is consumed or closed."""
+        try:
+            response = ep.client.invoke_model_with_response_stream(**call)
+        except BaseException:
+            self._release(ep)
+            raise
+        return dict(response, body=_StreamSlot(response.get("body"), lambda: self._release(ep)))
+
+    def _cool(self, ep: _Endpoint) -> None:
+        with self._lock:
+            ep.failures += 1
+            backoff = self.cooldown_s * min(2 ** (ep.failures - 1), 8)
+            ep.cooldown_until = time.monotonic() + backoff
+        print(f"⚠️ Bedrock endpoint {ep.name} cooling down for {backoff:.0f}s")
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        tried, last_error = set(), None
+        for _ in range(self.max_attempts):
+            if self.call_gate is not None:
+                self.call_gate()
+            generation = self.generation
+            ep = self._acquire(tried)
+            tried.add(ep.name)
+            call = dict(kwargs, modelId=ep.model_ids.get(kwargs.get("modelId"), kwargs.get("modelId")))
+            try:
+                response = self._call(ep, call)
+            except ClientError as e:
+                last_error = e
+                code = e.response.get("Error", {}).get("Code", "")
+                if code in EXPIRED_CODES:
+                    self.refresh_credentials(generation)
+                    continue
+                if code in FAILOVER_CODES:
+                    if code in THROTTLE_ERROR_CODES:
+                        ep.throttles += 1
+                        for listener in list(self._listeners):
+                            listener("throttle", ep.name)
+                    else:
+                        ep.errors += 1
+                    self._cool(ep)
+                    continue
+                ep.errors += 1
+                raise
+            except (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError) as e:
+                last_error = e
+                ep.errors += 1
+                self._cool(ep)
+                continue
+            with self._lock:
+                ep.calls += 1
+                ep.failures = 0
+            return response
+        raise last_error
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [ep.stats() for ep in self.endpoints]
+
 
-def init_bedrock_runtime():
-    """Initialize AWS Bedrock runtime client"""
+def init_bedrock_runtime(endpoints: Optional[List[dict]] = None,
+                         credentials_provider: Optional[Callable[[], Optional[dict]]] = config_file_credentials):
+    """Initialize the AWS Bedrock client pool (settings.BEDROCK_ENDPOINTS)"""
     try:
-        # Test the credentials by creating client
-        client = boto3.client('bedrock-runtime', region_name="us-west-2")
-        return client
+        return BedrockClientPool(endpoints, credentials_provider=credentials_provider)
 
     except Exception as e:
         print(f"Failed to initialize AWS Bedrock: {e}")
         print("Please refresh your AWS credentials in config.py")
-        return None
\ No newline at end of file
+        return None
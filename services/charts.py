@@ -1,54 +1,142 @@
 # services/charts.py
+import atexit
+import hashlib
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
-import matplotlib.pyplot as plt
+from typing import Dict, List, Optional
 
-def _save(fig, out_dir: Path, name: str) -> str:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    path = out_dir / name
-    fig.savefig(path, bbox_inches="tight", dpi=150)
-    plt.close(fig)
-    return str(path)
+CHART_DPI = 150
+MANIFEST_NAME = "charts_manifest.json"  # file name -> hash of the data it was rendered from
 
-def render_summary_charts(summary: Dict, out_dir: str) -> List[str]:
+# summary key -> how to draw it
+CHART_SPECS = [
+    {"key": "violations_by_category", "file": "violations_by_category.png", "kind": "bar",
+     "title": "Violations by Category", "xlabel": None, "ylabel": "Count"},
+    {"key": "violations_monthly", "file": "violations_trend_monthly.png", "kind": "line",
+     "title": "Violations Over Time (Monthly)", "xlabel": "Month", "ylabel": "Count"},
+    {"key": "top_repeat_offenders", "file": "repeat_offenders_top10.png", "kind": "bar",
+     "title": "Repeat Offenders (Top 10)", "xlabel": None, "ylabel": "Violations"},
+    # cross-run history from services/results_store.py (only when the store is enabled)
+    {"key": "history_violations_monthly", "file": "violations_trend_all_runs.png", "kind": "line",
+     "title": "Violations Over Time (All Runs)", "xlabel": "Month", "ylabel": "Count"},
+    {"key": "history_repeat_offenders", "file": "repeat_offenders_all_runs.png", "kind": "bar",
+     "title": "Repeat Offenders Across Runs (Top 10)", "xlabel": None, "ylabel": "Violations"},
+]
+
+
+# Worker pool is created on first use and reused for the rest of the session, so only the
+# first render pays for process start-up and the matplotlib import.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _warm_worker() -> None:
+    from matplotlib.figure import Figure  # noqa: F401
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: never fork a process that is running Tk or worker threads
+            ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=len(CHART_SPECS), mp_context=ctx, initializer=_warm_worker)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stops the worker processes, if started; runs at interpreter exit and when the app closes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def _render_chart(spec: Dict, data: Dict, path: str) -> str:
+    """
+    Draws one chart with the Agg canvas directly (no pyplot, no interactive backend),
+    so it is safe next to Tk and inside worker processes.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title(spec["title"])
+    labels = [str(k) for k in data.keys()]
+    values = list(data.values())
+    if spec["kind"] == "line":
+        ax.plot(labels, values, marker="o")
+    else:
+        ax.bar(labels, values)
+    ax.tick_params(axis="x", labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment("right")
+    if spec["ylabel"]:
+        ax.set_ylabel(spec["ylabel"])
+    if spec["xlabel"]:
+        ax.set_xlabel(spec["xlabel"])
+    fig.savefig(path, bbox_inches="tight", dpi=CHART_DPI)
+    return path
+
+
+def _chart_hash(spec: Dict, data: Dict) -> str:
+    payload = json.dumps({"spec": spec, "dpi": CHART_DPI, "data": data}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _load_manifest(out_path: Path) -> Dict[str, str]:
+    try:
+        return json.loads((out_path / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def render_summary_charts(summary: Dict, out_dir: str, parallel: bool = True) -> List[str]:
+    """
+    Renders the summary charts as PNGs under out_dir and returns their paths.
+    A chart is only re-rendered when the data it is drawn from changed since the last
+    render (tracked by hash in charts_manifest.json); pending charts are drawn in a
+    process pool, one chart per worker.
+    """
     out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(out_path)
+
     paths: List[str] = []
+    pending = []
+    for spec in CHART_SPECS:
+        data = summary.get(spec["key"], {})
+        if not data:
+            continue
+        path = out_path / spec["file"]
+        digest = _chart_hash(spec, data)
+        paths.append(str(path))
+        if manifest.get(spec["file"]) == digest and path.exists():
+            continue
+        pending.append((spec, data, str(path), digest))
+
+    if len(pending) > 1 and parallel:
+        executor = _get_pool()
+        futures = [executor.submit(_render_chart, spec, data, path) for spec, data, path, _ in pending]
+        for future in futures:
+            future.result()
+    else:
+        for spec, data, path, _ in pending:
+            _render_chart(spec, data, path)
 
-    # 1) Violations by Category (bar)
-    cat_counts = summary.get("violations_by_category", {})
-    if cat_counts:
-        cats = list(cat_counts.keys())
-        vals = list(cat_counts.values())
-        fig = plt.figure()
-        plt.title("Violations by Category")
-        plt.bar(cats, vals)
-        plt.xticks(rotation=45, ha="right")
-        plt.ylabel("Count")
-        paths.append(_save(fig, out_path, "violations_by_category.png"))
-
-    # 2) Monthly Trend of Violations (line)
-    monthly = summary.get("violations_monthly", {})
-    if monthly:
-        months = list(monthly.keys())
-        counts = list(monthly.values())
-        fig = plt.figure()
-        plt.title("Violations Over Time (Monthly)")
-        plt.plot(months, counts, marker="o")
-        plt.xticks(rotation=45, ha="right")
-        plt.ylabel("Count")
-        plt.xlabel("Month")
-        paths.append(_save(fig, out_path, "violations_trend_monthly.png"))
-
-    # 3) Top 10 Repeat Offenders (bar)
-    offenders = summary.get("top_repeat_offenders", {})
-    if offenders:
-        emps = list(offenders.keys())
-        counts = list(offenders.values())
-        fig = plt.figure()
-        plt.title("Repeat Offenders (Top 10)")
-        plt.bar(emps, counts)
-        plt.xticks(rotation=45, ha="right")
-        plt.ylabel("Violations")
-        paths.append(_save(fig, out_path, "repeat_offenders_top10.png"))
+    if pending:
+        for spec, _, _, digest in pending:
+            manifest[spec["file"]] = digest
+        (out_path / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
 
     return paths
@@ -0,0 +1,131 @@
+# services/concurrency.py
+"""
+AIMD window for in-flight Bedrock requests.
+
+The window grows by about one request per round trip while calls succeed (additive increase)
+and shrinks multiplicatively on ThrottlingException (x0.5), other errors (x0.75) or when the
+time-to-first-token climbs well above the best seen (x0.9, congestion before throttling).
+At most one decrease per round trip, so a burst of throttles from one overload counts once.
+"""
+import threading
+import time
+from typing import List, Optional
+
+from config.settings import (ADAPTIVE_CONCURRENCY, ADAPTIVE_INITIAL_INFLIGHT, ADAPTIVE_MIN_INFLIGHT,
+                             ADAPTIVE_MAX_INFLIGHT, ADAPTIVE_LATENCY_FACTOR)
+
+THROTTLE_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """True for Bedrock throttling errors (botocore ClientError codes)."""
+    response = getattr(exc, "response", None)
+    return isinstance(response, dict) and response.get("Error", {}).get("Code", "") in THROTTLE_ERROR_CODES
+
+
+class AIMDController:
+    """Blocking slot gate whose size follows the AIMD rules above. Thread-safe."""
+
+    def __init__(self, initial: float = ADAPTIVE_INITIAL_INFLIGHT, min_window: float = ADAPTIVE_MIN_INFLIGHT,
+                 max_window: float = ADAPTIVE_MAX_INFLIGHT, latency_factor: float = ADAPTIVE_LATENCY_FACTOR):
+        self.window = float(min(max(initial, min_window), max_window))
+        self.min_window = float(min_window)
+        self.max_window = float(max_window)
+        self.latency_factor = latency_factor
+        self.in_flight = 0
+        self.ttft_ewma: Optional[float] = None
+        self.ttft_best: Optional[float] = None
+        self.completed = self.throttles = self.errors = 0
+        self.peak_window = self.window
+        self.decisions: List[dict] = []
+        self._last_decrease = 0.0
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_settings(cls) -> "AIMDController":
+        """Adaptive window, or a fixed one of ADAPTIVE_MAX_INFLIGHT when ADAPTIVE_CONCURRENCY is off."""
+        if ADAPTIVE_CONCURRENCY:
+            return cls()
+        return cls(initial=ADAPTIVE_MAX_INFLIGHT, min_window=ADAPTIVE_MAX_INFLIGHT, max_window=ADAPTIVE_MAX_INFLIGHT)
+
+    def acquire(self, deadline_at: Optional[float] = None) -> bool:
+        """Waits for a free slot. False (no slot taken) if deadline_at (time.monotonic()) passes first."""
+        with self._cond:
+            while self.in_flight >= int(self.window):
+                remaining = None if deadline_at is None else deadline_at - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, outcome: str = "ok", ttft: Optional[float] = None) -> None:
+        """Frees a slot; outcome is "ok" or "error" (throttles are reported via on_throttle)."""
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.completed += 1
+                self._observe_ttft(ttft)
+                if not self._congested():
+                    self._set_window(self.window + 1.0 / self.window, "increase")
+            else:
+                self.errors += 1
+                self._decrease(0.75, "error")
+            self._cond.notify_all()
+
+    def on_throttle(self, *_args) -> None:
+        """Called for every ThrottlingException seen (by the dispatcher or the client pool)."""
+        with self._cond:
+            self.throttles += 1
+            self._decrease(0.5, "throttle")
+
+    def _observe_ttft(self, ttft: Optional[float]) -> None:
+        if ttft is None:
+            return
+        self.ttft_ewma = ttft if self.ttft_ewma is None else 0.8 * self.ttft_ewma + 0.2 * ttft
+        self.ttft_best = self.ttft_ewma if self.ttft_best is None else min(self.ttft_best, self.ttft_ewma)
+
+    def _congested(self) -> bool:
+        if self.ttft_ewma is None or self.ttft_best is None:
+            return False
+        if self.ttft_ewma > self.latency_factor * self.ttft_best:
+            self._decrease(0.9, "latency")
+            return True
+        return False
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        # one decrease per round trip (approximated by the smoothed time to first token)
+        now = time.monotonic()
+        if now - self._last_decrease < max(self.ttft_ewma or 1.0, 0.5):
+            return
+        self._last_decrease = now
+        self._set_window(self.window * factor, reason)
+
+    def _set_window(self, window: float, reason: str) -> None:
+        old = self.window
+        self.window = min(max(window, self.min_window), self.max_window)
+        self.peak_window = max(self.peak_window, self.window)
+        # log only decreases and whole-slot increases to keep the decision list short
+        if int(self.window) != int(old) or reason != "increase":
+            self.decisions.append({
+                "t": round(time.monotonic() - self._started, 3),
+                "reason": reason,
+                "window": round(self.window, 2),
+                "in_flight": self.in_flight,
+                "ttft_s": None if self.ttft_ewma is None else round(self.ttft_ewma, 3),
+            })
+
+    def summary(self) -> dict:
+        with self._cond:
+            return {
+                "window": round(self.window, 2),
+                "peak_window": round(self.peak_window, 2),
+                "completed": self.completed,
+                "throttles": self.throttles,
+                "errors": self.errors,
+                "ttft_ewma_s": None if self.ttft_ewma is None else round(self.ttft_ewma, 3),
+                "ttft_best_s": None if self.ttft_best is None else round(self.ttft_best, 3),
+            }
@@ -0,0 +1,198 @@
+# services/duplicate_detector.py
+"""
+Pre-audit detector for problems the per-group LLM audit cannot see:
+  - Duplicate / Near-duplicate: the same employee, vendor and amount charged on more than one
+    report on the same day (or within DUPLICATE_WINDOW_DAYS)
+  - Split: several charges from one vendor/expense type, each under the receipt ($75) or meal ($79)
+    cap, that together exceed it within SPLIT_WINDOW_DAYS
+Both run over the whole df_clean frame with hashed keys and a sort (O(n log n)); no pairwise
+comparison and no model calls.
+"""
+import re
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from config.settings import (DUPLICATE_WINDOW_DAYS, SPLIT_WINDOW_DAYS, RECEIPT_THRESHOLD, MEAL_DAILY_CAP,
+                             SPLIT_EXCLUDED_TYPES)
+
+FINDING_COLUMNS = ["Original Row", "Finding", "Related Rows", "Detail"]
+
+
+def _amounts(df: pd.DataFrame) -> pd.Series:
+    col = "Approved Amount (rpt)" if "Approved Amount (rpt)" in df.columns else "Expense Amount (rpt)"
+    return pd.to_numeric(df[col], errors="coerce")
+
+
+def _days(df: pd.DataFrame) -> np.ndarray:
+    dates = df["Transaction Date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+    days = dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    # NaT becomes the minimum int64; callers drop those rows
+    return days.astype(np.int64)
+
+
+def _norm_vendor(vendor: pd.Series) -> pd.Series:
+    return (vendor.astype(str).str.lower()
+            .str.replace(r"[^a-z0-9]+", "", regex=True)
+            .where(vendor.notna(), ""))
+
+
+def _key(*cols) -> np.ndarray:
+    """Hashes the given columns row-wise into one uint64 key."""
+    frame = pd.DataFrame({f"k{i}": pd.Series(c).reset_index(drop=True) for i, c in enumerate(cols)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _clusters(key: np.ndarray, day: np.ndarray, window) -> np.ndarray:
+    """
+    With rows sorted by (key, day): links consecutive rows with the same key no more than
+    `window` days apart (a number, or one per row) and returns a cluster id per row.
+    """
+    window = np.broadcast_to(window, len(key))
+    linked = np.zeros(len(key), dtype=bool)
+    if len(key) > 1:
+        linked[1:] = (key[1:] == key[:-1]) & (day[1:] - day[:-1] <= window[1:])
+    return np.cumsum(~linked)
+
+
+def _findings_frame(rows: pd.DataFrame, cluster: np.ndarray, finding, detail: pd.Series) -> pd.DataFrame:
+    related = rows.groupby(cluster)["Original Row"].transform(
+        lambda s: ", ".join(str(int(r)) for r in s))
+    return pd.DataFrame({
+        "Original Row": rows["Original Row"].to_numpy(),
+        "Finding": finding,
+        "Related Rows": related.to_numpy(),
+        "Detail": detail.to_numpy(),
+    })
+
+
+def find_duplicates(df_clean: pd.DataFrame, window_days: Optional[int] = None) -> pd.DataFrame:
+    """Same employee + vendor + amount on 2+ reports within window_days (0 = same day)."""
+    window = DUPLICATE_WINDOW_DAYS if window_days is None else window_days
+    amount = _amounts(df_clean)
+    day = _days(df_clean)
+    ok = (amount.notna() & (amount > 0) & df_clean["Vendor"].notna()).to_numpy() & (day > np.iinfo(np.int64).min)
+    if not ok.any():
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+
+    rows = pd.DataFrame({
+        "Original Row": df_clean["Original Row"].to_numpy()[ok],
+        "Report Key": df_clean["Report Key"].astype(str).to_numpy()[ok],
+        "Vendor": df_clean["Vendor"].astype(str).to_numpy()[ok],
+        "cents": np.round(amount.to_numpy()[ok] * 100).astype(np.int64),
+        "day": day[ok],
+        "key": _key(df_clean["Employee ID"].astype(str).to_numpy()[ok],
+                    _norm_vendor(df_clean["Vendor"]).to_numpy()[ok],
+                    np.round(amount.to_numpy()[ok] * 100).astype(np.int64)),
+    }).sort_values(["key", "day", "Report Key"], kind="stable").reset_index(drop=True)
+
+    cluster = _clusters(rows["key"].to_numpy(), rows["day"].to_numpy(), window)
+    by_cluster = rows.groupby(cluster)
+    n_reports = by_cluster["Report Key"].transform("nunique").to_numpy()
+    same_day = (by_cluster["day"].transform("nunique") == 1).to_numpy()
+    hit = n_reports >= 2
+    if not hit.any():
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+
+    rows, cluster, same_day = rows[hit], cluster[hit], same_day[hit]
+    reports = rows.groupby(cluster)["Report Key"].transform(lambda s: ", ".join(sorted(set(s))))
+    finding = np.where(same_day, "Duplicate", "Near-duplicate")
+    detail = (pd.Series(finding, index=rows.index) + ": " + rows["Vendor"] + " $"
+              + (rows["cents"] / 100).map("{:.2f}".format) + " charged on reports " + reports)
+    return _findings_frame(rows, cluster, finding, detail)
+
+
+def _is_meal(df: pd.DataFrame) -> np.ndarray:
+    meal = np.zeros(len(df), dtype=bool)
+    for col in ("Parent Expense Type", "Expense Type"):
+        if col in df.columns:
+            meal |= df[col].astype(str).str.contains("meal", case=False, na=False).to_numpy()
+    return meal
+
+
+def find_split_transactions(df_clean: pd.DataFrame, window_days: Optional[int] = None) -> pd.DataFrame:
+    """
+    Charges from one employee/vendor/expense type that are each under their cap but together exceed it:
+    meals against MEAL_DAILY_CAP on one day (the cap is per day), others against RECEIPT_THRESHOLD
+    within window_days.
+    Recurring or shared types in SPLIT_EXCLUDED_TYPES (nightly lodging, group meals, ...) are skipped, and so
+    are clusters made only of identical lines on one report (repeated entries, not a split).
+    """
+    window = SPLIT_WINDOW_DAYS if window_days is None else window_days
+    amount = _amounts(df_clean).to_numpy(dtype=float)
+    day = _days(df_clean)
+    meal = _is_meal(df_clean)
+    cap = np.where(meal, MEAL_DAILY_CAP, RECEIPT_THRESHOLD)
+    days = np.where(meal, 0, window)
+    exp_type = df_clean["Expense Type"].astype(str) if "Expense Type" in df_clean.columns else pd.Series("", index=df_clean.index)
+    excluded = exp_type.str.lower().str.contains("|".join(map(re.escape, SPLIT_EXCLUDED_TYPES)), regex=True, na=False).to_numpy() \
+        if SPLIT_EXCLUDED_TYPES else np.zeros(len(df_clean), dtype=bool)
+    ok = ((amount > 0) & (amount < cap) & ~excluded & df_clean["Vendor"].notna().to_numpy()
+          & (day > np.iinfo(np.int64).min))
+    if not ok.any():
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+
+    rows = pd.DataFrame({
+        "Original Row": df_clean["Original Row"].to_numpy()[ok],
+        "Report Key": df_clean["Report Key"].astype(str).to_numpy()[ok],
+        "Vendor": df_clean["Vendor"].astype(str).to_numpy()[ok],
+        "amount": amount[ok],
+        "cap": cap[ok],
+        "window": days[ok],
+        "day": day[ok],
+        "key": _key(df_clean["Employee ID"].astype(str).to_numpy()[ok],
+                    _norm_vendor(df_clean["Vendor"]).to_numpy()[ok],
+                    exp_type.to_numpy()[ok]),
+    }).sort_values(["key", "day"], kind="stable").reset_index(drop=True)
+
+    # Sliding window per key: composite (key rank, day) position + prefix sums + searchsorted
+    key_rank = pd.factorize(rows["key"], sort=False)[0].astype(np.int64)
+    span = int(rows["day"].max() - rows["day"].min()) + window + 1
+    pos = key_rank * span + (rows["day"].to_numpy() - rows["day"].min())
+    start = np.searchsorted(pos, pos - rows["window"].to_numpy(), side="left")
+    idx = np.arange(len(rows))
+    prefix = np.concatenate([[0.0], np.cumsum(rows["amount"].to_numpy())])
+    window_sum = prefix[idx + 1] - prefix[start]
+    over = (idx - start >= 1) & (window_sum > rows["cap"].to_numpy())
+    if not over.any():
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+
+    # Every row inside an over-cap window is part of the split; mark them with a difference array
+    marks = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.add.at(marks, start[over], 1)
+    np.add.at(marks, idx[over] + 1, -1)
+    in_split = np.cumsum(marks[:-1]) > 0
+
+    split = rows[in_split]
+    cluster = _clusters(split["key"].to_numpy(), split["day"].to_numpy(), split["window"].to_numpy())
+    # the same line repeated on one report (same day and amount) is not a split
+    by_cluster = split.groupby(cluster)
+    copies = ((by_cluster["Report Key"].transform("nunique") == 1) & (by_cluster["day"].transform("nunique") == 1)
+              & (by_cluster["amount"].transform("nunique") == 1)).to_numpy()
+    split, cluster = split[~copies], cluster[~copies]
+    if split.empty:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    totals = split.groupby(cluster)["amount"].transform("sum")
+    period = split["window"].map(lambda w: "on one day" if w == 0 else f"within {w} days")
+    detail = ("Split: " + split["Vendor"] + " charges each under $" + split["cap"].map("{:.0f}".format)
+              + " totaling $" + totals.map("{:.2f}".format) + " " + period)
+    return _findings_frame(split, cluster, "Split", detail)
+
+
+def detect_duplicates(df_clean: pd.DataFrame) -> pd.DataFrame:
+    """All detector findings (one row per Original Row and finding), columns FINDING_COLUMNS."""
+    parts = [f for f in (find_duplicates(df_clean), find_split_transactions(df_clean)) if not f.empty]
+    if not parts:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    findings = pd.concat(parts, ignore_index=True)
+    print(f"🔁 Detector: {findings['Original Row'].nunique()} rows with duplicate/split findings")
+    return findings
+
+
+def findings_by_row(findings: Optional[pd.DataFrame]) -> Dict[int, str]:
+    """Original Row -> '; '-joined finding details."""
+    if findings is None or findings.empty:
+        return {}
+    joined = findings.groupby("Original Row")["Detail"].agg("; ".join)
+    return {int(k): v for k, v in joined.items()}
@@ -1,25 +1,114 @@
 import pandas as pd
+from config.settings import COMPACT_DTYPES
+from services.source_sniffer import (SNIFF_ROWS, EXPENSE_HEADER_COLUMNS, find_header_row, locate_header,
+                                     normalize_header)
+
+# Columns rendered/parsed as dates
+DATE_COLUMNS = [
+    "Travel Start Date", "Travel End Date", "First Submitted Date", "Last Submitted Date",
+    "Reports to Approval 2", "Budget Approval", "Approved Date / Sent for Payment Date",
+    "Transaction Date", "Processor Approval Date", "Sent for Payment Date", "Paid Date"
+]
+
+AMOUNT_COLUMNS = ["Expense Amount (rpt)", "Approved Amount (rpt)", "Total Approved Amount (rpt)"]
+
+# Always categorical (heavily repeated identifiers and yes/no flags); other text columns
+# become categorical when at most CATEGORY_MAX_RATIO of their values are distinct
+CATEGORICAL_COLUMNS = [
+    "Employee ID", "Report Key", "Employee Department", "Trip Type", "Parent Expense Type",
+    "Expense Type", "Payment Type", "Vendor", "Vendor State/Province/Region", "Transportation Type",
+    "Are you traveling with students/employees?", "Is Personal Expense?", "Active/Term Date",
+]
+CATEGORY_MAX_RATIO = 0.5
 
 
 def load_excel_file(file_path):
-    xls = pd.ExcelFile(file_path)
-    df = pd.read_excel(xls, sheet_name=xls.sheet_names[0])
+    """
+    Reads the expense sheet from its detected header row (services/source_sniffer.py).
+    The index is offset by the rows above the header, so 'Original Row' (index + 2) stays the Excel row.
+    """
+    found = locate_header(file_path, EXPENSE_HEADER_COLUMNS)
+    if found is None:
+        xls = pd.ExcelFile(file_path)
+        return pd.read_excel(xls, sheet_name=xls.sheet_names[0])
+    df = pd.read_excel(file_path, sheet_name=found["sheet"], header=found["header"])
+    df.index = df.index + found["header"]
     return df
 
-def clean_data_sheet(df_raw):
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def _text_dtype():
+    # pyarrow-backed strings when pyarrow is installed, plain object otherwise
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return "string[pyarrow]"
+
+
+def compact_expense_frame(df: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
+    """
+    Normalizes dtypes of a cleaned expense frame (in place of the object columns read from Excel):
+    - date columns parsed once to datetime64
+    - amount columns to float64
+    - repeated text (IDs, department, expense types, vendor, yes/no ...) to categorical
+    - remaining free text to pyarrow strings when available
+    'Original Row' is left untouched. Prints memory before and after.
+    """
+    before = frame_memory_mb(df) if verbose else 0.0
+    out = df.copy()
+    text_dtype = _text_dtype()
+
+    for col in out.columns:
+        if col == "Original Row":
+            continue
+        s = out[col]
+        if col in DATE_COLUMNS:
+            if not pd.api.types.is_datetime64_any_dtype(s):
+                out[col] = pd.to_datetime(s, errors="coerce")
+        elif col in AMOUNT_COLUMNS:
+            out[col] = pd.to_numeric(s, errors="coerce").astype("float64")
+        elif col in CATEGORICAL_COLUMNS or (
+            s.dtype == object and s.nunique(dropna=True) <= CATEGORY_MAX_RATIO * max(len(s), 1)
+        ):
+            try:
+                out[col] = s.astype("category")
+            except TypeError:
+                # unorderable mixed types: categorize their string form, keep missing as missing
+                out[col] = s.where(s.isna(), s.astype(str)).astype("category")
+        elif s.dtype == object and text_dtype:
+            try:
+                out[col] = s.where(s.isna(), s.astype(str)).astype(text_dtype)
+            except (TypeError, ValueError):
+                pass
+
+    if verbose:
+        print(f"🧮 Compacted expense frame: {before:.1f} MB → {frame_memory_mb(out):.1f} MB")
+    return out
+
+
+def clean_data_sheet(df_raw, compact: bool = None):
     """
-    Cleans data sheet - handles both master reports (headers at row 0) and original files (headers at row 7)
+    Cleans data sheet - handles both master reports (headers at row 0) and original files (title lines
+    above the headers; the header row is detected in the first SNIFF_ROWS rows)
+    With compact=True (default: settings.COMPACT_DTYPES) the result also goes through compact_expense_frame.
     """
-    # Check if this is a master report (headers already at row 0) or original file (headers at row 7)
+    # Check if this is a master report (headers already at row 0) or original file (headers further down)
     if 'Employee ID' in df_raw.columns:
         # Master report case - headers already at row 0
         df1 = df_raw.copy()
         df1["Original Row"] = df_raw.index + 2  # Excel is 1-based
     else:
-        # Original file case - headers at row 7
-        df1 = df_raw[8:].copy()
-        df1.columns = df_raw.iloc[7]
-        df1["Original Row"] = df_raw.index[8:] + 2  # since Excel is 1-based and header is row 8
+        # Original file case - find the header row instead of assuming row 7
+        header = find_header_row(df_raw.head(SNIFF_ROWS).itertuples(index=False), EXPENSE_HEADER_COLUMNS)
+        if header is None:
+            print("⚠️ Expense header row not found in the first rows; assuming row 7")
+            header = 7
+        df1 = df_raw[header + 1:].copy()
+        df1.columns = df_raw.iloc[header]
+        df1["Original Row"] = df_raw.index[header + 1:] + 2  # Excel is 1-based, +1 for the pandas header line
 
     # Drop columns that are entirely NaN
     df1 = df1.dropna(axis=1, how='all')
@@ -28,7 +117,7 @@ def clean_data_sheet(df_raw):
     df1 = df1.reset_index(drop=True)
     # Normalize column names
     # df.columns = [str(col).strip().lower().replace(' ', '_').replace('\n', '_') for col in df.columns]
-    df1.columns = [str(c).strip().replace("\n", " ").replace("  ", " ") for c in df1.columns]
+    df1.columns = [normalize_header(c) for c in df1.columns]
     keep_columns = [
         "Original Row",
         "Employee ID",
@@ -63,6 +152,12 @@ def clean_data_sheet(df_raw):
         "Sent for Payment Date",
         "Paid Date"
     ]
+    # Merged from 'Request - Risk International Travel' in master reports only
+    optional_columns = ["Destination City/Location", "Destination Country"]
+    keep_columns += [c for c in optional_columns if c in df1.columns]
     df1 = df1[keep_columns]
 
+    if COMPACT_DTYPES if compact is None else compact:
+        df1 = compact_expense_frame(df1)
+
     return df1.copy(), df1
\ No newline at end of file
@@ -0,0 +1,90 @@
+# services/prioritizer.py
+"""
+Risk scoring for (Employee ID, Report Key) groups so the riskiest groups are audited first.
+All features are cheap vectorized aggregates over df_clean; nothing here calls the model.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from config.settings import PRIORITY_WEIGHTS, LATE_SUBMISSION_DAYS
+
+GROUP_KEYS = ["Employee ID", "Report Key"]
+
+
+def _is_international(df: pd.DataFrame) -> pd.Series:
+    intl = pd.Series(False, index=df.index)
+    if "Trip Type" in df.columns:
+        intl |= df["Trip Type"].astype(str).str.contains("international", case=False, na=False)
+    # merged from 'Request - Risk International Travel' (only present in master reports)
+    if "Destination Country" in df.columns:
+        country = df["Destination Country"].astype(str).str.strip().str.lower()
+        intl |= df["Destination Country"].notna() & ~country.isin(["united states", "usa", "us", ""])
+    return intl
+
+
+def _is_inactive(df: pd.DataFrame) -> pd.Series:
+    # 'Active/Term Date' holds the pay status from EE Active ("Active", "Off work", ...); an employee
+    # missing from EE Active (no status) is no longer on the active roster, so counts as inactive
+    if "Active/Term Date" not in df.columns:
+        return pd.Series(False, index=df.index)
+    status = df["Active/Term Date"].astype(object).where(df["Active/Term Date"].notna(), "")
+    return ~status.astype(str).str.strip().str.lower().str.startswith("active")
+
+
+def _late_days(df: pd.DataFrame) -> pd.Series:
+    if "Transaction Date" not in df.columns or "First Submitted Date" not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    tx, sub = df["Transaction Date"], df["First Submitted Date"]
+    if not pd.api.types.is_datetime64_any_dtype(tx):
+        tx = pd.to_datetime(tx, errors="coerce")
+    if not pd.api.types.is_datetime64_any_dtype(sub):
+        sub = pd.to_datetime(sub, errors="coerce")
+    return (sub - tx).dt.days.clip(lower=0).fillna(0).astype(float)
+
+
+def score_groups(df_clean: pd.DataFrame, weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    Returns one row per (Employee ID, Report Key), sorted by descending "score", with the
+    features it was built from: amount, international, inactive, late_days.
+    """
+    weights = {**PRIORITY_WEIGHTS, **(weights or {})}
+    amount_col = "Approved Amount (rpt)" if "Approved Amount (rpt)" in df_clean.columns else "Expense Amount (rpt)"
+
+    features = pd.DataFrame({
+        "Employee ID": df_clean["Employee ID"],
+        "Report Key": df_clean["Report Key"],
+        "amount": pd.to_numeric(df_clean[amount_col], errors="coerce").fillna(0.0),
+        "international": _is_international(df_clean),
+        "inactive": _is_inactive(df_clean),
+        "late_days": _late_days(df_clean),
+    })
+    grouped = features.groupby(GROUP_KEYS, observed=True, sort=False).agg(
+        amount=("amount", "sum"),
+        international=("international", "any"),
+        inactive=("inactive", "any"),
+        late_days=("late_days", "max"),
+    )
+
+    score = (
+        weights["amount"] * grouped["amount"].rank(pct=True)
+        + weights["international"] * grouped["international"].astype(float)
+        + weights["inactive"] * grouped["inactive"].astype(float)
+        + weights["late"] * np.clip(grouped["late_days"] / LATE_SUBMISSION_DAYS, 0.0, 1.0)
+    )
+    grouped["score"] = score
+    return grouped.sort_values(["score", "amount"], ascending=False, kind="stable")
+
+
+def select_groups(scores: pd.DataFrame, group_count: Optional[int] = None) -> List[tuple]:
+    """Top `group_count` group keys in score order (all groups if None)."""
+    keys = list(scores.index)
+    return keys if group_count is None else keys[:group_count]
+
+
+def dollar_coverage(scores: pd.DataFrame, audited_keys) -> float:
+    """Share of the total amount that belongs to the audited groups (0..1)."""
+    total = scores["amount"].sum()
+    if total <= 0:
+        return 0.0
+    audited = scores.loc[scores.index.isin(list(audited_keys)), "amount"].sum()
+    return float(audited / total)
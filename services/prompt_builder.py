@@ -1,8 +1,11 @@
+# Per-group row number shown to the model instead of 'Original Row' (see services/auditor.py)
+ROW_ID_COLUMN = "Row ID"
 
-def format_employee_expenses_as_csv(employee_df, max_rows=10000):
+
+def format_employee_expenses_as_csv(employee_df, max_rows=10000, keep_columns=(ROW_ID_COLUMN,)):
     """
     Converts an employee's expense records into a CSV-formatted string for LLM prompt.
-    - Removes columns with same value in all rows.
+    - Removes columns with same value in all rows (except keep_columns).
     - Returns CSV and list of constant fields.
     """
     df_trunc = employee_df.head(max_rows)
@@ -12,7 +15,7 @@ def format_employee_expenses_as_csv(employee_df, max_rows=10000):
     variable_df = df_trunc.copy()
 
     for col in df_trunc.columns:
-        if df_trunc[col].nunique(dropna=False) == 1:
+        if col not in keep_columns and df_trunc[col].nunique(dropna=False) == 1:
             constant_columns[col] = df_trunc[col].iloc[0]
             variable_df.drop(columns=[col], inplace=True)
 
@@ -26,8 +29,17 @@ def format_employee_expenses_as_csv(employee_df, max_rows=10000):
     return constants_text, csv_text
 
 
-def create_audit_prompt(constant_fields: str, csv_data: str, policy_text: str = "") -> str:
+def create_audit_prompt(constant_fields: str, csv_data: str, policy_text: str = "", findings_text: str = "",
+                        ask_confidence: bool = False) -> str:
     policy_block = f"\n\n### Policy Reference (user-provided):\n{policy_text}\n" if policy_text else ""
+    findings_block = (
+        "\n### Cross-report checks (pre-computed over all reports; verify and cite them if they apply):\n"
+        f"{findings_text}\n"
+    ) if findings_text else ""
+    # Screening prompts also ask how sure the model is, to decide on escalation
+    confidence_line = (
+        "\n    Confidence: <0.0-1.0>   (how certain you are that these lists are complete and correct)"
+    ) if ask_confidence else ""
     return f"""
 \n\nHuman: You are a travel expense compliance auditor.
 
@@ -40,22 +52,23 @@ The expense data is split into two parts:
 Use **both the constant and variable fields** when checking for compliance.
 
 Be clear and specific about each row:
+- Refer to rows as "Row <Row ID>"
 - What was violated or what exception applies
 - Why it's a violation or exception
 - Any important details
 
 At the end of your response:
-👉 Return two separate lists of **Original Row** values at the end of the response (from the 'Original Row' column in the CSV):
+👉 Return two separate lists of **Row ID** values at the end of the response (from the 'Row ID' column in the CSV):
 Example:
-    Violation Rows: 120, 123, 127  
-    Exception Rows: 121, 125
+    Violation Rows: 2, 5, 7
+    Exception Rows: 3, 6{confidence_line}
 
 ### Constant Fields (apply to all rows):
 {constant_fields}
 
 ### Variable Expense Records (CSV):
 {csv_data}
-{policy_block}
+{findings_block}{policy_block}
 
 \n\nAssistant:
 """
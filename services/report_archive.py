@@ -0,0 +1,136 @@
+# services/report_archive.py
+"""
+Append-only archive for per-group model responses.
+
+Instead of one .txt per (Employee ID, Report Key) in REPORTS_DIR, every response is
+zlib-compressed into a single SQLite file, indexed by employee/report key and run ID.
+Reruns never overwrite earlier responses; they are just new rows with a new run ID.
+
+Lookup from the command line:
+    python -m services.report_archive <employee_id> <report_key> [--run-id RUN] [--out FILE]
+    python -m services.report_archive --list-runs
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Union
+
+from config.settings import REPORT_ARCHIVE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id       TEXT NOT NULL,
+    employee_id  TEXT NOT NULL,
+    report_key   TEXT NOT NULL,
+    created_at   TEXT NOT NULL,
+    body         BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_group ON responses (employee_id, report_key);
+CREATE INDEX IF NOT EXISTS idx_responses_run ON responses (run_id);
+"""
+
+# One writer at a time inside a process; SQLite handles locking across processes
+_write_lock = threading.Lock()
+
+
+def _connect(archive_path: Optional[Union[str, Path]] = None) -> sqlite3.Connection:
+    path = Path(archive_path or REPORT_ARCHIVE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def append_response(run_id: str, employee_id, report_key, response: str,
+                    archive_path: Optional[Union[str, Path]] = None) -> str:
+    """
+    Appends one group's model response to the archive. Returns a short locator string
+    (used in place of the .txt path in log output).
+    """
+    body = zlib.compress(response.encode("utf-8"), 6)
+    created_at = datetime.now().isoformat(timespec="seconds")
+    with _write_lock:
+        conn = _connect(archive_path)
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO responses (run_id, employee_id, report_key, created_at, body) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (str(run_id), str(employee_id), str(report_key), created_at, body),
+                )
+                row_id = cur.lastrowid
+        finally:
+            conn.close()
+    return f"{Path(archive_path or REPORT_ARCHIVE_PATH)}#{row_id}"
+
+
+def get_response(employee_id, report_key, run_id: Optional[str] = None,
+                 archive_path: Optional[Union[str, Path]] = None) -> Optional[str]:
+    """
+    Returns the narrative for one group: from `run_id` if given, else the latest one.
+    None if the group was never archived.
+    """
+    conn = _connect(archive_path)
+    try:
+        sql = "SELECT body FROM responses WHERE employee_id = ? AND report_key = ?"
+        params = [str(employee_id), str(report_key)]
+        if run_id:
+            sql += " AND run_id = ?"
+            params.append(str(run_id))
+        sql += " ORDER BY id DESC LIMIT 1"
+        row = conn.execute(sql, params).fetchone()
+    finally:
+        conn.close()
+    return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+
+def list_runs(archive_path: Optional[Union[str, Path]] = None) -> List[tuple]:
+    """Returns [(run_id, group_count, first_created_at), ...] oldest first."""
+    conn = _connect(archive_path)
+    try:
+        return conn.execute(
+            "SELECT run_id, COUNT(*), MIN(created_at) FROM responses "
+            "GROUP BY run_id ORDER BY MIN(id)"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Extract a group's audit narrative from the response archive.")
+    parser.add_argument("employee_id", nargs="?")
+    parser.add_argument("report_key", nargs="?")
+    parser.add_argument("--run-id", help="Run to read from (default: latest run containing the group)")
+    parser.add_argument("--archive", help=f"Archive file (default: {REPORT_ARCHIVE_PATH})")
+    parser.add_argument("--out", help="Write the narrative to this file instead of stdout")
+    parser.add_argument("--list-runs", action="store_true", help="List archived runs and exit")
+    args = parser.parse_args(argv)
+
+    if args.list_runs:
+        for run_id, count, created_at in list_runs(args.archive):
+            print(f"{run_id}\t{count} groups\t{created_at}")
+        return 0
+
+    if not args.employee_id or not args.report_key:
+        parser.error("employee_id and report_key are required unless --list-runs is given")
+
+    text = get_response(args.employee_id, args.report_key, run_id=args.run_id, archive_path=args.archive)
+    if text is None:
+        print(f"No archived response for Employee ID {args.employee_id}, Report Key {args.report_key}",
+              file=sys.stderr)
+        return 1
+
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,11 @@
 # services/report_writer.py
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Optional, Union, Dict
+from typing import Optional, Union, Dict, List, Tuple
+import numpy as np
 import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill
@@ -10,7 +15,9 @@ from openpyxl.drawing.image import Image as XLImage
 from pathlib import Path
 from services.summary_stats import compute_summary
 from services.charts import render_summary_charts
-from config.settings import REPORTS_DIR
+from config.settings import (REPORTS_DIR, DETECT_DUPLICATES, RESULTS_STORE, DEFAULT_POLICY_FILE, PERSIST_ARTIFACTS,
+                             REPORT_WORKERS, REPORT_SINGLE_WORKBOOK, ensure_reports_dir)
+from services.io_loader import DATE_COLUMNS
 
 
 def flag_audit_rows(
@@ -24,150 +31,222 @@ def flag_audit_rows(
     Adds 'Audit Flag' with 'Violation'/'Exception'/''.
     IMPORTANT: We flag against df_original['Original Row'] (not df_clean).
     """
-    def get_flag(row_number: int) -> str:
-        if row_number in violation_rows:
-            return "Violation"
-        if row_number in exception_rows:
-            return "Exception"
-        return ""
-
     df_out = df_original.copy()
     if "Original Row" not in df_out.columns:
         raise KeyError("Missing required column 'Original Row' in df_original")
 
-    df_out["Audit Flag"] = df_out["Original Row"].apply(get_flag)
+    # Violation wins over Exception; set membership per row instead of list scans
+    rows = df_out["Original Row"]
+    df_out["Audit Flag"] = np.select(
+        [rows.isin(set(violation_rows)), rows.isin(set(exception_rows))], ["Violation", "Exception"], default=""
+    )
     return df_out
 
 
-def save_to_excel_with_formatting(
-    df_flagged: pd.DataFrame,
-    output_path: Optional[Union[str, Path]] = None
-) -> str:
+def apply_detector_findings(df_flagged: pd.DataFrame, findings: Optional[pd.DataFrame]) -> pd.DataFrame:
     """
-    Saves df_flagged to Excel with row color fills based on 'Audit Flag'.
-    Returns the output path as string.
+    Adds a 'Detector Finding' column from duplicate/split findings and marks those rows as
+    'Exception' (for review) unless the audit already flagged them.
     """
-    # Columns to render as dates
-    date_columns = [
-        "Travel Start Date", "Travel End Date", "First Submitted Date", "Last Submitted Date",
-        "Reports to Approval 2", "Budget Approval", "Approved Date / Sent for Payment Date",
-        "Transaction Date", "Processor Approval Date", "Sent for Payment Date", "Paid Date"
-    ]
+    from services.duplicate_detector import findings_by_row
+    df_out = df_flagged.copy()
+    by_row = findings_by_row(findings)
+    df_out["Detector Finding"] = df_out["Original Row"].map(by_row).fillna("")
+    needs_review = (df_out["Detector Finding"] != "") & (df_out["Audit Flag"] == "")
+    df_out.loc[needs_review, "Audit Flag"] = "Exception"
+    return df_out
 
-    # Default output path (timestamped) under project_root/audit_reports
-    if output_path is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = REPORTS_DIR / f"Audited_Expenses_{timestamp}.xlsx"
-    else:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Coerce dates for display
-    df_x = df_flagged.copy()
-    for col in date_columns:
-        if col in df_x.columns:
-            df_x[col] = pd.to_datetime(df_x[col], errors='coerce').dt.date
+FLAG_FILLS = {"Violation": "FFC7CE", "Exception": "FFFACD"}  # row fill colours (red / yellow)
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Audited Data"
+# Report worker pool: created on first use and reused, like the chart pool (services/charts.py)
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
 
-    for r in dataframe_to_rows(df_x, index=False, header=True):
-        ws.append(r)
 
-    red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    yellow_fill = PatternFill(start_color="FFFACD", end_color="FFFACD", fill_type="solid")
+def _warm_worker() -> None:
+    import openpyxl  # noqa: F401
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: never fork a process that is running Tk or worker threads
+            ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=ctx, initializer=_warm_worker)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stops the worker processes, if started; runs at interpreter exit and when the app closes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
 
-    if "Audit Flag" not in df_x.columns:
+atexit.register(shutdown_pool)
+
+
+def _display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of df with the date columns as plain dates (shown as mm/dd/yy)."""
+    df_x = df.copy()
+    for col in DATE_COLUMNS:
+        if col in df_x.columns:
+            if not pd.api.types.is_datetime64_any_dtype(df_x[col]):
+                df_x[col] = pd.to_datetime(df_x[col], errors='coerce')
+            df_x[col] = df_x[col].dt.date
+    return df_x
+
+
+def _partition(df_flagged: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Splits df_flagged by 'Audit Flag' in one pass: {"Violation": df, "Exception": df}."""
+    if "Audit Flag" not in df_flagged.columns:
         raise KeyError("Missing required column 'Audit Flag' in df_flagged")
-    audit_flag_col = list(df_x.columns).index("Audit Flag") + 1  # 1-based
+    groups = dict(tuple(df_flagged.groupby("Audit Flag", sort=False)))
+    return {flag: groups.get(flag, df_flagged.iloc[0:0]) for flag in FLAG_FILLS}
 
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):  # skip header
-        cell = row[audit_flag_col - 1]
-        if cell.value == "Violation":
+
+def _fill_sheet(ws, df: pd.DataFrame, fill_color: Optional[str] = None) -> None:
+    """
+    Writes df (header + rows) to ws.
+    fill_color None (audited sheet): rows are filled by their 'Audit Flag', date columns shown as
+    mm/dd/yy and the header row frozen. Otherwise every row gets fill_color and nothing else (split reports).
+    """
+    for r in dataframe_to_rows(df, index=False, header=True):
+        ws.append(r)
+
+    if fill_color is not None:
+        row_fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
             for c in row:
-                c.fill = red_fill
-        elif cell.value == "Exception":
+                c.fill = row_fill
+        return
+
+    fills = {flag: PatternFill(start_color=c, end_color=c, fill_type="solid") for flag, c in FLAG_FILLS.items()}
+    flag_idx = list(df.columns).index("Audit Flag")
+    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):  # skip header
+        fill = fills.get(row[flag_idx].value)
+        if fill is not None:
             for c in row:
-                c.fill = yellow_fill
+                c.fill = fill
 
     # Excel display format for dates
-    for idx, col in enumerate(df_x.columns, start=1):
-        if col in date_columns:
-            col_letter = get_column_letter(idx)
-            for cell in ws[col_letter][1:]:
+    for idx, col in enumerate(df.columns, start=1):
+        if col in DATE_COLUMNS:
+            for cell in ws[get_column_letter(idx)][1:]:
                 cell.number_format = "mm/dd/yy"
-
     ws.freeze_panes = "A2"
+
+
+def write_workbook(output_path: Union[str, Path], sheets: List[Tuple[str, pd.DataFrame, Optional[str]]],
+                   chart_paths: Optional[list] = None) -> str:
+    """
+    Builds one workbook from sheets [(title, frame, fill colour or None), ...] (see _fill_sheet),
+    adds the charts as a "Summary" sheet and saves it once. Runs in the report worker processes.
+    """
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, df, fill_color in sheets:
+        _fill_sheet(wb.create_sheet(title), df, fill_color)
+    if chart_paths:
+        embed_images_in_workbook(wb, chart_paths)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
     wb.save(output_path)
-    print(f"✅ Saved audited file to: {output_path}")
     return str(output_path)
 
 
+def save_to_excel_with_formatting(
+    df_flagged: pd.DataFrame,
+    output_path: Optional[Union[str, Path]] = None,
+    chart_paths: Optional[list] = None
+) -> str:
+    """
+    Saves df_flagged to Excel with row color fills based on 'Audit Flag'.
+    If chart_paths is given, the charts are embedded in a "Summary" sheet before the
+    single save. Returns the output path as string.
+    """
+    if "Audit Flag" not in df_flagged.columns:
+        raise KeyError("Missing required column 'Audit Flag' in df_flagged")
+    # Default output path (timestamped) under project_root/audit_reports
+    if output_path is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = ensure_reports_dir() / f"Audited_Expenses_{timestamp}.xlsx"
+
+    path = write_workbook(output_path, [("Audited Data", _display_frame(df_flagged), None)], chart_paths)
+    print(f"✅ Saved audited file to: {path}")
+    return path
+
+
 def create_violations_exceptions_report(
     df_flagged: pd.DataFrame,
-    audit_results: Optional[list] = None
+    audit_results: Optional[list] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+    parts: Optional[Dict[str, pd.DataFrame]] = None,
+    timestamp: Optional[str] = None
 ) -> Dict[str, Optional[str]]:
     """
     Creates separate Violations and Exceptions workbooks.
+    With an executor both are written concurrently in it; `parts` reuses an existing _partition.
     Returns dict of written paths: {"violations": str|None, "exceptions": str|None}
     """
     paths: Dict[str, Optional[str]] = {"violations": None, "exceptions": None}
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # Safely access "Audit Flag"
-    flag_col = "Audit Flag"
-    if flag_col not in df_flagged.columns:
-        raise KeyError("Missing required column 'Audit Flag' in df_flagged")
-
-    violations_df = df_flagged[df_flagged[flag_col] == "Violation"].copy()
-    exceptions_df = df_flagged[df_flagged[flag_col] == "Exception"].copy()
-    print(f"Found {len(violations_df)} violations and {len(exceptions_df)} exceptions")
-
-    def _write(df: pd.DataFrame, out_path: Path, fill: PatternFill, title: str) -> str:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = title
-        for r in dataframe_to_rows(df, index=False, header=True):
-            ws.append(r)
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-            for cell in row:
-                cell.fill = fill
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        wb.save(out_path)
-        print(f"✅ Saved {title} report to: {out_path}")
-        return str(out_path)
-
-    if not violations_df.empty:
-        red = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        v_path = REPORTS_DIR / f"Violations_Report_{timestamp}.xlsx"
-        paths["violations"] = _write(violations_df, v_path, red, "Violations")
-
-    if not exceptions_df.empty:
-        yellow = PatternFill(start_color="FFFACD", end_color="FFFACD", fill_type="solid")
-        e_path = REPORTS_DIR / f"Exceptions_Report_{timestamp}.xlsx"
-        paths["exceptions"] = _write(exceptions_df, e_path, yellow, "Exceptions")
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    parts = parts if parts is not None else _partition(df_flagged)
+    print(f"Found {len(parts['Violation'])} violations and {len(parts['Exception'])} exceptions")
+
+    jobs = {key: (REPORTS_DIR / f"{title}_Report_{timestamp}.xlsx", [(title, parts[flag], FLAG_FILLS[flag])])
+            for key, flag, title in (("violations", "Violation", "Violations"), ("exceptions", "Exception", "Exceptions"))
+            if not parts[flag].empty}
+    if executor is None:
+        written = {key: write_workbook(path, sheets) for key, (path, sheets) in jobs.items()}
+    else:
+        futures = {key: executor.submit(write_workbook, path, sheets) for key, (path, sheets) in jobs.items()}
+        written = {key: future.result() for key, future in futures.items()}
 
+    for key, path in written.items():
+        paths[key] = path
+        print(f"✅ Saved {jobs[key][1][0][0]} report to: {path}")
     return paths
 
 
 def audit_and_flag(
     df_original: pd.DataFrame,
     df_clean: pd.DataFrame,
-    bedrock_runtime
+    bedrock_runtime,
+    run_id: Optional[str] = None,
+    persist: Optional[bool] = None
 ):
     """
     Runs the LLM audit for a sample of employee-report groups, flags df_original,
     saves the audited file and split reports, and returns (audited_subset, paths_dict).
+    With PERSIST_ARTIFACTS (or persist=True) the inputs and the audit output are also saved
+    under artifacts/<run_id>/, so write_reports can be re-run without auditing again.
     NOTE: This is long-running; normally you'd keep it in a controller, but provided
     here since you said you aren't using controllers right now.
     """
     # Import here to avoid circular imports
-    from services.auditor import run_audit_for_multiple_employees
-    from services.report_writer import embed_images_in_workbook
+    from services.auditor import run_audit_for_multiple_employees, new_run_id
+    from services.duplicate_detector import detect_duplicates
+    from services.run_metrics import RunMetrics
+    from services import artifacts
+
+    run_id = run_id or new_run_id()
+    persist = PERSIST_ARTIFACTS if persist is None else persist
+    metrics = RunMetrics(run_id)
+    if persist:
+        for stage, frame in (("original", df_original), ("clean", df_clean)):
+            if not artifacts.has_stage(run_id, stage):
+                artifacts.save_frame(frame, run_id, stage)
+    # Cross-report duplicates/splits over the whole frame (the LLM only sees one group at a time)
+    findings = detect_duplicates(df_clean) if DETECT_DUPLICATES else None
+
     # Run audit via Bedrock (sampled groups inside the function)
     violation_rows, exception_rows, audit_results = run_audit_for_multiple_employees(
-        df_clean, bedrock_runtime
+        df_clean, bedrock_runtime, run_id=run_id, findings=findings, metrics=metrics
     )
 
     # Basic sanity checks
@@ -191,35 +270,92 @@ def audit_and_flag(
         if grp.empty:
             print(f"⚠️ No matching rows for Employee ID: {emp_id}, Report Key: {report_key}")
         audited_row_numbers.update(grp["Original Row"].tolist())
+    if findings is not None:
+        # only findings inside the audited groups; the rest of the dataset was not selected for this run
+        findings = findings[findings["Original Row"].isin(audited_row_numbers)]
 
     # Keep only audited rows; then flag
     audited_subset = df_o[df_o["Original Row"].isin(audited_row_numbers)].copy()
     audited_subset = flag_audit_rows(audited_subset, df_clean, violation_rows, exception_rows)
+    if findings is not None:
+        audited_subset = apply_detector_findings(audited_subset, findings)
+        metrics.set("detector_rows", int(findings["Original Row"].nunique()))
 
-    audited_path = save_to_excel_with_formatting(audited_subset)
+    if RESULTS_STORE:
+        from services.results_store import record_run
+        from services.policy_loader import load_policy_text
+        record_run(run_id, audited_subset, audit_results, policy_text=load_policy_text(str(DEFAULT_POLICY_FILE)))
+    if persist:
+        artifacts.save_frame(audited_subset, run_id, "flagged")
+        artifacts.save_audit_results(run_id, audit_results)
+
+    write_reports(df_original, audited_subset, audit_results)
+    print(f"📈 Run metrics saved to: {metrics.save()}")
+
+    return audited_subset
 
-    # ===== Management Visuals =====
 
+def write_reports(df_original: pd.DataFrame, audited_subset: pd.DataFrame, audit_results: Optional[list] = None,
+                  single_workbook: Optional[bool] = None) -> str:
+    """
+    Report stage: summary charts, the audited workbook (with Summary sheet) and the
+    Violations/Exceptions workbooks, or all of them as sheets of one workbook (REPORT_SINGLE_WORKBOOK).
+    The flagged frame is partitioned once; the audited and split workbooks are written concurrently
+    in worker processes (REPORT_WORKERS). Returns the audited (or single) workbook path.
+    """
+    single_workbook = REPORT_SINGLE_WORKBOOK if single_workbook is None else single_workbook
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    reports_dir = ensure_reports_dir()
+    parts = _partition(audited_subset)
 
+    # ===== Management Visuals =====
     summary = compute_summary(df_original=df_original, df_flagged=audited_subset)
+    if RESULTS_STORE:
+        from services.results_store import repeat_offenders, monthly_trend
+        summary["history_violations_monthly"] = monthly_trend()
+        summary["history_repeat_offenders"] = repeat_offenders()
     chart_dir = REPORTS_DIR / "summary_charts"
     chart_dir.mkdir(parents=True, exist_ok=True)
     chart_paths = render_summary_charts(summary, out_dir=str(chart_dir))
 
-    # Optional: Embed charts into Excel
-
-    embed_images_in_workbook(audited_path, chart_paths)
-
-    create_violations_exceptions_report(audited_subset, audit_results)
+    audited_sheet = ("Audited Data", _display_frame(audited_subset), None)
+    if single_workbook:
+        print(f"Found {len(parts['Violation'])} violations and {len(parts['Exception'])} exceptions")
+        split_sheets = [(title, parts[flag], FLAG_FILLS[flag])
+                        for flag, title in (("Violation", "Violations"), ("Exception", "Exceptions"))
+                        if not parts[flag].empty]
+        path = write_workbook(reports_dir / f"Audit_Report_{timestamp}.xlsx", [audited_sheet] + split_sheets,
+                              chart_paths)
+        print(f"✅ Saved audit report to: {path}")
+        return path
+
+    audited_path = reports_dir / f"Audited_Expenses_{timestamp}.xlsx"
+    pool = _get_pool() if REPORT_WORKERS > 1 else None
+    if pool is None:
+        path = write_workbook(audited_path, [audited_sheet], chart_paths)
+        create_violations_exceptions_report(audited_subset, audit_results, parts=parts, timestamp=timestamp)
+    else:
+        # the audited workbook (the largest write) runs while the split reports are written next to it
+        future = pool.submit(write_workbook, audited_path, [audited_sheet], chart_paths)
+        create_violations_exceptions_report(audited_subset, audit_results, executor=pool, parts=parts,
+                                            timestamp=timestamp)
+        path = future.result()
+    print(f"✅ Saved audited file to: {path}")
+    return path
 
-    return audited_subset
 
-def embed_images_in_workbook(xlsx_path: str, image_paths: list, sheet_name: str = "Summary", start_cell: str = "A1"):
+def embed_images_in_workbook(xlsx_path: Union[str, Workbook], image_paths: list, sheet_name: str = "Summary",
+                             start_cell: str = "A1"):
     """
     Inserts PNGs into a new sheet. One below another.
+    Pass an in-memory Workbook to add the sheet before it is first saved (returned unsaved);
+    a path reopens and rewrites the file.
     """
-    from openpyxl import load_workbook
-    wb = load_workbook(xlsx_path)
+    if isinstance(xlsx_path, Workbook):
+        wb = xlsx_path
+    else:
+        from openpyxl import load_workbook
+        wb = load_workbook(xlsx_path)
     ws = wb.create_sheet(sheet_name)
     row = int(''.join(filter(str.isdigit, start_cell)) or 1)
     col = ''.join(filter(str.isalpha, start_cell)) or "A"
@@ -232,5 +368,7 @@ def embed_images_in_workbook(xlsx_path: str, image_paths: list, sheet_name: str
         # bump ~25 rows between images (depends on chart size)
         row += 25
 
+    if wb is xlsx_path:
+        return wb
     wb.save(xlsx_path)
     return xlsx_path
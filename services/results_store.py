@@ -0,0 +1,251 @@
+# services/results_store.py
+"""
+History of audit results across runs.
+
+Every audited expense line of every run is appended to one SQLite file (RESULTS_STORE_PATH)
+with its run ID, policy version (hash of the policy text), flag and reason. Indexed queries by
+employee, department, category and period replace reopening old Audited_Expenses workbooks.
+
+A line audited in several runs (same report, date, category and amount; matched by occurrence when
+a report has several such lines) counts once, with the verdict of its latest run, in repeat_offenders()
+and monthly_trend(). Each line's newest row carries is_latest = 1 (maintained on insert), so those
+queries use the partial indexes below.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from config.settings import RESULTS_STORE_PATH
+from services.summary_stats import DEFAULT_COLS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id          TEXT PRIMARY KEY,
+    run_at          TEXT NOT NULL,
+    policy_version  TEXT,
+    lines           INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audit_lines (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id          TEXT NOT NULL,
+    run_at          TEXT NOT NULL,
+    policy_version  TEXT,
+    line_key        TEXT NOT NULL,
+    original_row    INTEGER,
+    employee_id     TEXT,
+    report_key      TEXT,
+    department      TEXT,
+    category        TEXT,
+    txn_date        TEXT,          -- YYYY-MM-DD
+    period          TEXT,          -- YYYY-MM
+    amount          REAL,
+    flag            TEXT NOT NULL, -- 'Violation' | 'Exception' | ''
+    reason          TEXT,
+    is_latest       INTEGER NOT NULL DEFAULT 1  -- newest row of its line_key
+);
+CREATE INDEX IF NOT EXISTS idx_lines_employee ON audit_lines (employee_id, period);
+CREATE INDEX IF NOT EXISTS idx_lines_department ON audit_lines (department, period);
+CREATE INDEX IF NOT EXISTS idx_lines_category ON audit_lines (category, period);
+CREATE INDEX IF NOT EXISTS idx_lines_period ON audit_lines (period, flag);
+CREATE INDEX IF NOT EXISTS idx_lines_run ON audit_lines (run_id);
+CREATE INDEX IF NOT EXISTS idx_lines_key ON audit_lines (line_key, id);
+CREATE INDEX IF NOT EXISTS idx_latest_employee ON audit_lines (employee_id, period) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_department ON audit_lines (department, period) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_category ON audit_lines (category, period) WHERE is_latest = 1;
+CREATE INDEX IF NOT EXISTS idx_latest_flag ON audit_lines (flag, period) WHERE is_latest = 1;
+CREATE VIEW IF NOT EXISTS latest_lines AS
+    SELECT * FROM audit_lines WHERE is_latest = 1;
+"""
+
+_write_lock = threading.Lock()
+_ROW_REF = re.compile(r"\bRows?(?:\s+IDs?)?\s*#?\s*(\d+(?:\s*(?:,|and|&)\s*\d+)*)", re.IGNORECASE)
+
+
+def _connect(store_path: Optional[Union[str, Path]] = None) -> sqlite3.Connection:
+    path = Path(store_path or RESULTS_STORE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def policy_version(policy_text: Optional[str]) -> Optional[str]:
+    """Short hash identifying the policy text a run was audited against."""
+    if not policy_text:
+        return None
+    return hashlib.sha1(policy_text.encode("utf-8")).hexdigest()[:12]
+
+
+def row_reasons(audit_results: Optional[List[dict]]) -> Dict[int, str]:
+    """
+    Original Row -> the first response line that mentions it ("Row 3: ..."), per audited group.
+    Row IDs are mapped through the result's row_map (reused verdicts carry one too); rows the model
+    only listed in the footer get no reason.
+    """
+    reasons: Dict[int, str] = {}
+    for result in audit_results or []:
+        row_map = result.get("row_map")
+        if not row_map:
+            continue
+        for line in str(result.get("response", "")).splitlines():
+            if re.match(r"\s*(violation|exception)\s*rows\s*[:\-]", line, flags=re.IGNORECASE):
+                continue
+            for match in _ROW_REF.finditer(line):
+                for n in re.findall(r"\d+", match.group(1)):
+                    if 1 <= int(n) <= len(row_map):
+                        reasons.setdefault(int(row_map[int(n) - 1]), line.strip(" -*•\t")[:300])
+    return reasons
+
+
+def _col(df: pd.DataFrame, key: str) -> Optional[str]:
+    return next((c for c in DEFAULT_COLS[key] if c in df.columns), None)
+
+
+def _text(df: pd.DataFrame, key: str) -> pd.Series:
+    col = _col(df, key)
+    if col is None:
+        return pd.Series(None, index=df.index, dtype=object)
+    s = df[col]
+    return s.astype(object).where(s.notna(), None).map(lambda v: None if v is None else str(v))
+
+
+def record_run(run_id: str, df_flagged: pd.DataFrame, audit_results: Optional[List[dict]] = None,
+               policy_text: Optional[str] = None, store_path: Optional[Union[str, Path]] = None) -> int:
+    """
+    Appends every line of df_flagged (the audited subset with 'Audit Flag') for run_id.
+    Reasons come from the model response lines and the 'Detector Finding' column. Returns lines written.
+    """
+    if df_flagged.empty:
+        return 0
+    run_at = datetime.now().isoformat(timespec="seconds")
+    version = policy_version(policy_text)
+
+    date_col = _col(df_flagged, "date")
+    dates = (pd.to_datetime(df_flagged[date_col], errors="coerce") if date_col
+             else pd.Series(pd.NaT, index=df_flagged.index))
+    day = dates.dt.strftime("%Y-%m-%d").astype(object).where(dates.notna(), None)
+    period = dates.dt.strftime("%Y-%m").astype(object).where(dates.notna(), None)
+    amount_col = _col(df_flagged, "amount")
+    amount = (pd.to_numeric(df_flagged[amount_col], errors="coerce") if amount_col
+              else pd.Series(float("nan"), index=df_flagged.index))
+    employee, report = _text(df_flagged, "employee"), df_flagged["Report Key"].astype(str)
+    category = _text(df_flagged, "category")
+    flags = df_flagged["Audit Flag"].astype(object).fillna("").astype(str)
+
+    # Same report + date + category + amount = same expense line in a later run, even if the export's
+    # rows moved; identical lines of one day are told apart by their occurrence (in source-row order)
+    rows = df_flagged["Original Row"].astype(int)
+    content = (report + "|" + day.fillna("").astype(str) + "|" + category.fillna("").astype(str)
+               + "|" + amount.round(2).astype(str)).to_numpy()
+    occurrence = (pd.DataFrame({"key": content, "row": rows.to_numpy()})
+                  .sort_values("row", kind="stable").groupby("key").cumcount().sort_index())
+    line_key = [f"{key}|{n}" for key, n in zip(content, occurrence)]
+
+    llm = row_reasons(audit_results)
+    detector = (df_flagged["Detector Finding"].astype(object).fillna("").astype(str)
+                if "Detector Finding" in df_flagged.columns else pd.Series("", index=df_flagged.index))
+    reason = [
+        "; ".join(p for p in (llm.get(r, "") if f else "", d) if p) or None
+        for r, f, d in zip(rows, flags, detector)
+    ]
+
+    records = list(zip(
+        [run_id] * len(df_flagged), [run_at] * len(df_flagged), [version] * len(df_flagged),
+        line_key, rows.tolist(), employee, report, _text(df_flagged, "department"), category,
+        day, period, amount.astype(object).where(amount.notna(), None), flags, reason,
+    ))
+    with _write_lock:
+        conn = _connect(store_path)
+        try:
+            with conn:
+                # earlier verdicts of these lines stop being the latest in the same transaction
+                conn.executemany("UPDATE audit_lines SET is_latest = 0 WHERE line_key = ? AND is_latest = 1",
+                                 [(key,) for key in line_key])
+                conn.executemany(
+                    "INSERT INTO audit_lines (run_id, run_at, policy_version, line_key, original_row, employee_id, "
+                    "report_key, department, category, txn_date, period, amount, flag, reason, is_latest) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)", records)
+                conn.execute("INSERT OR REPLACE INTO runs (run_id, run_at, policy_version, lines) VALUES (?, ?, ?, ?)",
+                             (run_id, run_at, version, len(records)))
+        finally:
+            conn.close()
+    print(f"🗃️ Stored {len(records)} audited lines for run {run_id}")
+    return len(records)
+
+
+def _where(employee=None, department=None, category=None, period_from=None, period_to=None,
+           flag=None, run_id=None):
+    clauses, params = [], []
+    for column, value in (("employee_id", employee), ("department", department), ("category", category),
+                          ("flag", flag), ("run_id", run_id)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(str(value))
+    if period_from:
+        clauses.append("period >= ?")
+        params.append(period_from)
+    if period_to:
+        clauses.append("period <= ?")
+        params.append(period_to)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_lines(employee=None, department=None, category=None, period_from: Optional[str] = None,
+                period_to: Optional[str] = None, flag: Optional[str] = None, run_id: Optional[str] = None,
+                latest_only: bool = False, store_path: Optional[Union[str, Path]] = None) -> pd.DataFrame:
+    """
+    Stored lines matching all given filters (periods are 'YYYY-MM', inclusive).
+    latest_only keeps each expense line's most recent verdict.
+    """
+    where, params = _where(employee, department, category, period_from, period_to, flag, run_id)
+    table = "latest_lines" if latest_only else "audit_lines"
+    conn = _connect(store_path)
+    try:
+        return pd.read_sql_query(f"SELECT * FROM {table}{where} ORDER BY id", conn, params=params)
+    finally:
+        conn.close()
+
+
+def repeat_offenders(min_reports: int = 2, limit: int = 10, period_from: Optional[str] = None,
+                     period_to: Optional[str] = None,
+                     store_path: Optional[Union[str, Path]] = None) -> Dict[str, int]:
+    """
+    Employee ID -> violations over all stored runs, for employees with violations on at least
+    `min_reports` different reports. Largest first, at most `limit`.
+    """
+    where, params = _where(flag="Violation", period_from=period_from, period_to=period_to)
+    sql = (f"SELECT employee_id, COUNT(*) AS n FROM latest_lines{where} GROUP BY employee_id "
+           "HAVING COUNT(DISTINCT report_key) >= ? ORDER BY n DESC, employee_id LIMIT ?")
+    conn = _connect(store_path)
+    try:
+        return {str(e): int(n) for e, n in conn.execute(sql, params + [min_reports, limit])}
+    finally:
+        conn.close()
+
+
+def monthly_trend(flag: str = "Violation", employee=None, department=None, category=None,
+                  store_path: Optional[Union[str, Path]] = None) -> Dict[str, int]:
+    """'YYYY-MM' -> number of lines with `flag` over all stored runs (latest verdict per line)."""
+    where, params = _where(employee, department, category, flag=flag)
+    where += (" AND" if where else " WHERE") + " period IS NOT NULL"
+    sql = f"SELECT period, COUNT(*) FROM latest_lines{where} GROUP BY period ORDER BY period"
+    conn = _connect(store_path)
+    try:
+        return {p: int(n) for p, n in conn.execute(sql, params)}
+    finally:
+        conn.close()
+
+
+def list_runs(store_path: Optional[Union[str, Path]] = None) -> List[tuple]:
+    """(run_id, run_at, policy_version, lines) for every stored run, oldest first."""
+    conn = _connect(store_path)
+    try:
+        return conn.execute("SELECT run_id, run_at, policy_version, lines FROM runs ORDER BY run_at").fetchall()
+    finally:
+        conn.close()
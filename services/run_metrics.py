@@ -0,0 +1,48 @@
+# services/run_metrics.py
+"""
+Per-run counters and figures (groups audited, verdict reuse, dollar coverage, model tiering, ...),
+collected while an audit runs and saved as audit_reports/Run_Metrics_<run_id>.json.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from config.settings import ensure_reports_dir
+
+
+class RunMetrics:
+    """Thread-safe bag of named metrics for one run."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started = time.time()
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, n: Union[int, float] = 1) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._values[key] = value
+
+    def append(self, key: str, value) -> None:
+        with self._lock:
+            self._values.setdefault(key, []).append(value)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            values = dict(self._values)
+        return {"run_id": self.run_id, "elapsed_s": round(time.time() - self.started, 3), **values}
+
+    def save(self, path: Optional[Union[str, Path]] = None) -> str:
+        path = Path(path) if path else ensure_reports_dir() / f"Run_Metrics_{self.run_id}.json"
+        path.write_text(json.dumps(self.as_dict(), indent=2, default=str), encoding="utf-8")
+        return str(path)
@@ -0,0 +1,98 @@
+# services/source_sniffer.py
+"""
+Header-row and source detection from the top of a workbook, without parsing the whole sheet.
+
+Concur/PeopleSoft exports put a few title and filter lines above the column headers (0-8 rows
+depending on the report), and the five master-report sources are told apart by their columns
+rather than their file names. Only the first SNIFF_ROWS rows of each sheet are read, in openpyxl
+read-only mode; the full pd.read_excel then starts at the detected header row.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+SNIFF_ROWS = 30
+
+# Master-report source -> columns its header row must contain (the ones combine_and_format uses)
+SOURCE_SIGNATURES = {
+    "Expense Type Detail": ["Employee ID", "Report Key", "Transaction Date", "Expense Type",
+                            "Approved Amount (rpt)", "Request ID(s)"],
+    "EE Active": ["Emplid", "Empl Status Pay Ldescr", "Division", "Deptid Ldescr", "Position Ldescr"],
+    "CF Information": ["Report Key", "Request ID and Destination", "Total Approved Amount (rpt)",
+                       "Processor Approval Date"],
+    "Processor Paid Summary": ["Report Key", "Sent for Payment Date", "Paid Date", "Transaction Date",
+                               "Expense Type", "Approved Amount"],
+    "Risk International Travel": ["Request ID", "Authorized Date", "Destination City/Location",
+                                  "Destination Country"],
+}
+
+# Header of an expense-line sheet: an Expense Type Detail export or a combined master report
+EXPENSE_HEADER_COLUMNS = ["Employee ID", "Report Key", "Expense Type", "Approved Amount (rpt)"]
+
+
+def normalize_header(value) -> str:
+    """Column name as clean_data_sheet normalizes it."""
+    return str(value).strip().replace("\n", " ").replace("  ", " ")
+
+
+def find_header_row(rows: Iterable[Sequence], required: Sequence[str]) -> Optional[int]:
+    """0-based index of the first row that contains every name in `required`, or None."""
+    needed = set(required)
+    for i, row in enumerate(rows):
+        if needed.issubset({normalize_header(v) for v in row if v is not None}):
+            return i
+    return None
+
+
+def sniff_sheets(path: Union[str, Path], n_rows: int = SNIFF_ROWS) -> Dict[str, List[tuple]]:
+    """First n_rows rows (cell values) of every sheet; {} if openpyxl can't open the file (e.g. legacy .xls)."""
+    from openpyxl import load_workbook
+    try:
+        wb = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        print(f"⚠️ Could not sniff {Path(path).name}: {e}")
+        return {}
+    try:
+        sheets = {}
+        for ws in wb.worksheets:
+            if not hasattr(ws, "iter_rows"):  # chartsheets
+                continue
+            ws.reset_dimensions()  # some exports declare A1:A1; read the real rows (as pandas does)
+            sheets[ws.title] = list(ws.iter_rows(max_row=n_rows, values_only=True))
+        return sheets
+    finally:
+        wb.close()
+
+
+def locate_header(path: Union[str, Path], required: Sequence[str]) -> Optional[dict]:
+    """{"sheet", "header"} of the first sheet whose top rows contain the `required` columns, else None."""
+    for sheet, rows in sniff_sheets(path).items():
+        header = find_header_row(rows, required)
+        if header is not None:
+            return {"sheet": sheet, "header": header}
+    return None
+
+
+def sniff_source(path: Union[str, Path]) -> Optional[dict]:
+    """
+    Which master-report source `path` is, from its content: {"source", "sheet", "header"}.
+    When several signatures match (a combined report has most columns), the longest one wins.
+    """
+    best = None
+    for sheet, rows in sniff_sheets(path).items():
+        for source, columns in SOURCE_SIGNATURES.items():
+            if best is not None and len(columns) <= len(SOURCE_SIGNATURES[best["source"]]):
+                continue
+            header = find_header_row(rows, columns)
+            if header is not None:
+                best = {"source": source, "sheet": sheet, "header": header}
+    return best
+
+
+def classify_sources(paths: Iterable[Union[str, Path]]) -> Dict[str, str]:
+    """{source: path} for the files sniff_source recognizes (the first file wins per source)."""
+    found: Dict[str, str] = {}
+    for path in paths:
+        match = sniff_source(path)
+        if match is not None:
+            found.setdefault(match["source"], str(path))
+    return found
@@ -1,11 +1,19 @@
 # services/summary_stats.py
-from typing import List
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 DEFAULT_COLS = {
     "employee": ["Employee ID", "EmployeeId", "Employee_Id"],
+    "department": ["Employee Department", "Department", "Deptid Ldescr"],
     "category": ["Expense Type", "Category", "Parent Expense Type", "Expense_Category"],
     "flag":     ["Audit Flag", "Flag"],
+    "amount": ["Approved Amount (rpt)", "Expense Amount (rpt)", "Amount"],
     "date": [
         "Transaction Date",
         "Approved Date / Sent for Payment Date",
@@ -15,81 +23,214 @@ DEFAULT_COLS = {
     ],
 }
 
+# Cube dimensions, in key order. Measures are "count" and "amount".
+CUBE_DIMS = ("employee", "department", "category", "month", "flag")
+
+# Small per-process caches keyed by a content fingerprint of the inputs, so repeated
+# summaries over the same run (charts, Summary sheet, dashboards) don't recompute.
+_CACHE_SIZE = 8
+_cube_cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+_summary_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
 def _pick(df: pd.DataFrame, candidates: List[str]) -> str:
     for c in candidates:
         if c in df.columns:
             return c
     raise KeyError(f"None of {candidates} found. Available: {list(df.columns)}")
 
-# services/summary_stats.py
-from collections import Counter
-from typing import Dict, List
-import pandas as pd
 
-# If you already have resolve_col(), keep using it; otherwise this is a tiny inline version:
-def _resolve_col(df: pd.DataFrame, candidates: List[str]):
-    cols = list(df.columns)
-    norm = {str(c).strip().lower(): c for c in cols}
+@lru_cache(maxsize=256)
+def _resolve_in(columns: Tuple, candidates: Tuple) -> Optional[str]:
+    # Normalized lookup built once per column set, then exact -> case-insensitive -> loose contains
+    norm = {str(c).strip().lower(): c for c in columns}
     for cand in candidates:
-        if cand in df.columns:
+        if cand in columns:
             return cand
+    for cand in candidates:
         key = str(cand).strip().lower()
         if key in norm:
             return norm[key]
+    for cand in candidates:
+        key = str(cand).strip().lower()
         for k, orig in norm.items():
             if key in k:   # loose contains
                 return orig
     return None
 
 
+def _resolve_col(df: pd.DataFrame, candidates: List[str]):
+    return _resolve_in(tuple(df.columns), tuple(candidates))
 
-def compute_summary(df_original: pd.DataFrame, df_flagged: pd.DataFrame,
-                    colmap: Dict[str, str] = None) -> Dict:
-    colmap = colmap or {}
-    # Resolve column names from whatever your file actually has (no renaming!)
-    emp = colmap.get("employee") or _resolve_col(df_original, DEFAULT_COLS["employee"])
-    cat = colmap.get("category") or _resolve_col(df_original, DEFAULT_COLS["category"])
-    flag = colmap.get("flag")     or _resolve_col(df_flagged,  DEFAULT_COLS["flag"])
-    date = colmap.get("date")     or _resolve_col(df_original, DEFAULT_COLS["date"])
 
-    if emp is None or cat is None or flag is None:
+def _resolve_all(df_original: pd.DataFrame, df_flagged: pd.DataFrame, colmap: Dict[str, str]) -> Dict[str, Optional[str]]:
+    cols = {}
+    for key in ("employee", "department", "category", "amount", "date"):
+        cols[key] = colmap.get(key) or _resolve_col(df_original, DEFAULT_COLS[key])
+    cols["flag"] = colmap.get("flag") or _resolve_col(df_flagged, DEFAULT_COLS["flag"])
+    if cols["employee"] is None or cols["category"] is None or cols["flag"] is None:
         raise KeyError("Missing required columns among employee/category/flag in provided dataframes.")
+    return cols
+
+
+def _fingerprint(df_original: pd.DataFrame, df_flagged: pd.DataFrame, cols: Dict[str, Optional[str]]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    o_cols = ["Original Row"] + [cols[k] for k in ("employee", "department", "category", "amount", "date") if cols[k]]
+    f_cols = ["Original Row", cols["flag"]]
+    for df, subset in ((df_original, o_cols), (df_flagged, f_cols)):
+        h.update(repr(subset).encode())
+        h.update(pd.util.hash_pandas_object(df[subset], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _cache_get(cache: OrderedDict, key: str):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _cache_put(cache: OrderedDict, key: str, value) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > _CACHE_SIZE:
+            cache.popitem(last=False)
+
 
-    # --- CRITICAL PART: pick only necessary columns to avoid duplicates ---
-    left  = df_flagged[["Original Row", flag]].copy()              # only keep the flag from flagged df
-    right_cols = ["Original Row", emp, cat] + ([date] if date else [])
-    right = df_original[right_cols].copy()
+def _codes(values) -> Tuple[np.ndarray, int]:
+    """Categorical codes plus level count, with missing values folded into their own trailing level."""
+    codes, uniques = pd.factorize(values, sort=False)
+    n_levels = len(uniques)
+    missing = codes < 0
+    if missing.any():
+        codes = np.where(missing, n_levels, codes)
+        n_levels += 1
+    return codes.astype(np.int64), n_levels
 
-    # Now merge has no overlapping column names except the key, so no _x/_y suffixes
-    merged = left.merge(right, on="Original Row", how="left", validate="many_to_one", suffixes=("", ""))
 
-    # Totals
-    total_flagged = int((merged[flag] == "Violation").sum() + (merged[flag] == "Exception").sum())
-    by_flag = merged[flag].value_counts().to_dict()
+def _aggregate(df_original: pd.DataFrame, df_flagged: pd.DataFrame, cols: Dict[str, Optional[str]]) -> pd.DataFrame:
+    # Align flagged rows to df_original by 'Original Row' with a positional lookup (no merge)
+    orig_rows = pd.Index(df_original["Original Row"])
+    if not orig_rows.is_unique:
+        keep = ~orig_rows.duplicated()
+        df_original = df_original.loc[keep]
+        orig_rows = orig_rows[keep]
+    pos = orig_rows.get_indexer(df_flagged["Original Row"])
+    hit = pos >= 0
 
-    # Violations by category
-    viol = merged[merged[flag] == "Violation"]
-    by_category = viol[cat].value_counts().to_dict()
+    def take(col):
+        if not col:
+            return None
+        out = np.full(len(pos), None, dtype=object)
+        out[hit] = df_original[col].iloc[pos[hit]].to_numpy(dtype=object)
+        return out
 
-    # Monthly trend (optional if a date col exists)
-    monthly = {}
-    if date:
-        months = pd.to_datetime(merged[date], errors="coerce").dt.to_period("M").astype(str)
-        monthly = (merged.assign(_Month=months)
-                         .loc[merged[flag] == "Violation", "_Month"]
-                         .value_counts()
-                         .sort_index()
-                         .to_dict())
+    flags = df_flagged[cols["flag"]].fillna("").astype(str).to_numpy()
+    amounts = np.zeros(len(pos))
+    if cols["amount"]:
+        src = pd.to_numeric(df_original[cols["amount"]].iloc[pos[hit]], errors="coerce").to_numpy(dtype=float)
+        amounts[hit] = np.nan_to_num(src)
+
+    # Months as datetime64[M] codes; labels are only formatted for the final cube cells
+    months = np.full(len(pos), np.datetime64("NaT"), dtype="datetime64[M]")
+    if cols["date"]:
+        dates = df_original[cols["date"]].iloc[pos[hit]]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, errors="coerce")
+        months[hit] = dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+
+    emp = take(cols["employee"])
+    emp = np.where(pd.isna(emp), None, emp.astype(str)).astype(object)
+    dims = {
+        "employee": emp,
+        "department": take(cols["department"]) if cols["department"] else np.full(len(pos), None, dtype=object),
+        "category": take(cols["category"]),
+        "month": months,
+        "flag": flags,
+    }
+
+    # Fold all dimension codes into one compact cell key, re-compacting after each step
+    # so the key space never exceeds the number of rows.
+    key = np.zeros(len(pos), dtype=np.int64)
+    for name in CUBE_DIMS:
+        codes, n_levels = _codes(dims[name])
+        key = key * n_levels + codes
+        _, key = np.unique(key, return_inverse=True)
+        key = key.astype(np.int64)
+
+    n_cells = int(key.max()) + 1 if len(key) else 0
+    counts = np.bincount(key, minlength=n_cells)
+    sums = np.bincount(key, weights=amounts, minlength=n_cells)
+    _, first = np.unique(key, return_index=True)  # first row of each cell
+
+    cells = {name: dims[name][first] for name in CUBE_DIMS}
+    month_cells = cells["month"]
+    cells["month"] = np.where(np.isnat(month_cells), None,
+                              np.datetime_as_string(month_cells, unit="M")).astype(object)
+    cube = pd.DataFrame({name: pd.Categorical(cells[name]) for name in CUBE_DIMS})
+    cube["count"] = counts.astype(np.int64)
+    cube["amount"] = sums
+    return cube
+
+
+def build_summary_cube(df_original: pd.DataFrame, df_flagged: pd.DataFrame,
+                       colmap: Dict[str, str] = None) -> pd.DataFrame:
+    """
+    Single-pass aggregation of the flagged rows into a compact cube with one row per
+    (employee, department, category, month, flag) cell and "count"/"amount" measures.
+    Charts, the Summary sheet and dashboards should all derive from this one frame.
+    Cached by a fingerprint of the inputs.
+    """
+    colmap = colmap or {}
+    cols = _resolve_all(df_original, df_flagged, colmap)
+    return _cached_cube(df_original, df_flagged, cols, _fingerprint(df_original, df_flagged, cols))
+
+
+def _cached_cube(df_original: pd.DataFrame, df_flagged: pd.DataFrame,
+                 cols: Dict[str, Optional[str]], fp: str) -> pd.DataFrame:
+    cube = _cache_get(_cube_cache, fp)
+    if cube is None:
+        cube = _aggregate(df_original, df_flagged, cols)
+        _cache_put(_cube_cache, fp, cube)
+    return cube
+
+
+def summary_from_cube(cube: pd.DataFrame) -> Dict:
+    """Derives the chart/Summary-sheet dict from a cube built by build_summary_cube."""
+    def totals(frame: pd.DataFrame, by: str) -> pd.Series:
+        return frame.groupby(by, observed=True, dropna=True)["count"].sum()
+
+    by_flag = totals(cube, "flag").sort_values(ascending=False, kind="stable")
+    total_flagged = int(by_flag.get("Violation", 0) + by_flag.get("Exception", 0))
+
+    viol = cube[cube["flag"] == "Violation"]
+    by_category = totals(viol, "category").sort_values(ascending=False, kind="stable")
+    monthly = totals(viol, "month").sort_index()
 
     # Repeat offenders (2+)
-    offenders = Counter(viol[emp].dropna().astype(str))
-    top10 = dict(sorted(((k, v) for k, v in offenders.items() if v >= 2),
-                        key=lambda x: x[1], reverse=True)[:10])
+    offenders = totals(viol, "employee")
+    offenders = offenders[offenders >= 2].sort_values(ascending=False, kind="stable").head(10)
 
     return {
         "total_flagged": total_flagged,
-        "by_flag": by_flag,
-        "violations_by_category": by_category,
-        "violations_monthly": monthly,       # {} if no usable date column
-        "top_repeat_offenders": top10,
+        "by_flag": {k: int(v) for k, v in by_flag.items()},
+        "violations_by_category": {k: int(v) for k, v in by_category.items()},
+        "violations_monthly": {str(k): int(v) for k, v in monthly.items()},   # {} if no usable date column
+        "top_repeat_offenders": {str(k): int(v) for k, v in offenders.items()},
     }
+
+
+def compute_summary(df_original: pd.DataFrame, df_flagged: pd.DataFrame,
+                    colmap: Dict[str, str] = None) -> Dict:
+    colmap = colmap or {}
+    # Resolve column names from whatever your file actually has (no renaming!)
+    cols = _resolve_all(df_original, df_flagged, colmap)
+    fp = _fingerprint(df_original, df_flagged, cols)
+    summary = _cache_get(_summary_cache, fp)
+    if summary is None:
+        summary = summary_from_cube(_cached_cube(df_original, df_flagged, cols, fp))
+        _cache_put(_summary_cache, fp, summary)
+    return copy.deepcopy(summary)
@@ -0,0 +1,164 @@
+# services/verdict_cache.py
+"""
+Reuse of verdicts between structurally identical expense groups.
+
+A group's rows are canonicalized (IDs, 'Original Row' and exact dates removed; dates kept only
+as offsets from the trip start) into a signature. Groups with the signature of an already
+audited group get its verdict pattern remapped onto their own rows instead of a Bedrock call.
+A sample of those groups is still audited to spot-check the reuse.
+"""
+import hashlib
+import threading
+from typing import Dict, List, Optional
+import pandas as pd
+from services.io_loader import DATE_COLUMNS, AMOUNT_COLUMNS
+
+SIGNATURE_EXCLUDED = ["Original Row", "Employee ID", "Report Key"]
+GROUP_KEYS = ["Employee ID", "Report Key"]
+
+
+def _as_dates(s: pd.Series) -> pd.Series:
+    return s if pd.api.types.is_datetime64_any_dtype(s) else pd.to_datetime(s, errors="coerce")
+
+
+def group_signatures(df: pd.DataFrame) -> Dict[tuple, tuple]:
+    """
+    Canonicalizes every (Employee ID, Report Key) group of df in one vectorized pass.
+    Returns {(employee_id, report_key): (signature, original_rows)} where original_rows lists
+    the group's 'Original Row' values in canonical row order (the order the signature hashes).
+    """
+    if df.empty:
+        return {}
+    keys = [df[k].astype(str) for k in GROUP_KEYS]
+    cols = [c for c in df.columns if c not in SIGNATURE_EXCLUDED]
+
+    # Dates become day offsets from the group's trip start (or first transaction)
+    start = None
+    for anchor in ("Travel Start Date", "Transaction Date"):
+        if anchor in df.columns:
+            first = _as_dates(df[anchor]).groupby(keys, observed=True).transform("min")
+            start = first if start is None else start.fillna(first)
+
+    parts = []
+    for col in cols:
+        s = df[col]
+        if col in DATE_COLUMNS:
+            if start is None:
+                continue
+            text = (_as_dates(s) - start).dt.days.astype("Int64").astype(str)
+        elif col in AMOUNT_COLUMNS:
+            text = pd.to_numeric(s, errors="coerce").round(2).map("{:.2f}".format)
+        else:
+            text = s.astype(str).str.strip().str.lower().str.replace(r"\s+", " ", regex=True)
+            text = text.where(s.notna(), "")
+        parts.append(text.astype(object).fillna("").astype(str).reset_index(drop=True))
+    header = "\x1e".join(str(c) for c in cols)
+    row_text = parts[0].str.cat(parts[1:], sep="\x1f", na_rep="") if parts else pd.Series("", index=range(len(df)))
+
+    canon = pd.DataFrame({
+        "employee": keys[0].reset_index(drop=True),
+        "report": keys[1].reset_index(drop=True),
+        "text": row_text,
+        "row": df["Original Row"].to_numpy(),
+    }).sort_values(["employee", "report", "text"], kind="stable")
+
+    out = {}
+    original_keys = dict(zip(zip(keys[0], keys[1]), zip(df[GROUP_KEYS[0]], df[GROUP_KEYS[1]])))
+    for (emp, rep), grp in canon.groupby(["employee", "report"], sort=False):
+        digest = hashlib.sha1(header.encode("utf-8"))
+        digest.update("\x1e".join(grp["text"]).encode("utf-8"))
+        out[original_keys[(emp, rep)]] = (digest.hexdigest(), [int(r) for r in grp["row"]])
+    return out
+
+
+def canonical_group(df_emp: pd.DataFrame):
+    """(signature, original_rows) for a single group; see group_signatures."""
+    return next(iter(group_signatures(df_emp).values()))
+
+
+def verdict_pattern(original_rows: List[int], violation_rows, exception_rows) -> List[str]:
+    """Per canonical position: 'Violation', 'Exception' or ''."""
+    viol, exce = set(violation_rows), set(exception_rows)
+    return ["Violation" if r in viol else "Exception" if r in exce else "" for r in original_rows]
+
+
+class VerdictCache:
+    """Signature -> verdict of the group that was actually audited. Thread-safe."""
+
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.spot_checks = 0
+        self.disagreements = 0
+
+    def put(self, signature: str, original_rows: List[int], result: dict) -> None:
+        with self._lock:
+            if signature in self._entries:
+                return
+            row_map = result.get("row_map")
+            self._entries[signature] = {
+                "pattern": verdict_pattern(original_rows, result["violation_rows"], result["exception_rows"]),
+                # canonical position of each of the audited group's Row IDs, to renumber its narrative
+                "id_positions": ([original_rows.index(r) for r in row_map]
+                                 if row_map and sorted(row_map) == sorted(original_rows) else None),
+                "employee_id": result["employee_id"],
+                "report_key": result["report_key"],
+                "response": result["response"],
+                "trusted": True,
+            }
+
+    def get(self, signature: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(signature)
+            return entry if entry and entry["trusted"] else None
+
+    def check(self, signature: str, original_rows: List[int], result: dict) -> bool:
+        """
+        Compares a spot-checked group's real verdict with the cached one. A disagreement marks the
+        signature untrusted, so its remaining groups are audited normally.
+        """
+        pattern = verdict_pattern(original_rows, result["violation_rows"], result["exception_rows"])
+        with self._lock:
+            self.spot_checks += 1
+            entry = self._entries.get(signature)
+            if entry is None:
+                return True
+            agrees = entry["pattern"] == pattern
+            if not agrees:
+                self.disagreements += 1
+                entry["trusted"] = False
+            return agrees
+
+    def reuse(self, signature: str, employee_id, report_key, original_rows: List[int]) -> Optional[dict]:
+        """
+        Builds a result for this group from the cached verdict (None if not cached/trusted).
+        Its row_map numbers this group's rows like the audited group's Row IDs, so the reused
+        narrative and the footer (and the saved row_id_legend) point at this group's lines.
+        """
+        entry = self.get(signature)
+        if entry is None:
+            return None
+        with self._lock:
+            self.reused += 1
+        violation_rows = [r for r, f in zip(original_rows, entry["pattern"]) if f == "Violation"]
+        exception_rows = [r for r, f in zip(original_rows, entry["pattern"]) if f == "Exception"]
+        positions = entry["id_positions"]
+        row_map = [original_rows[p] for p in positions] if positions else list(original_rows)
+        row_ids = {r: i for i, r in enumerate(row_map, start=1)}
+        response = (
+            f"[Verdict reused from Employee ID {entry['employee_id']}, Report Key {entry['report_key']} "
+            f"(identical expense pattern). Row IDs renumbered to this report.]\n"
+            f"Violation Rows: {', '.join(str(row_ids[r]) for r in violation_rows) or 'None'}\n"
+            f"Exception Rows: {', '.join(str(row_ids[r]) for r in exception_rows) or 'None'}\n\n"
+            f"--- Original narrative ---\n{entry['response']}"
+        )
+        return {
+            "employee_id": employee_id,
+            "report_key": report_key,
+            "response": response,
+            "violation_rows": violation_rows,
+            "exception_rows": exception_rows,
+            "row_map": row_map,
+            "reused_from": (entry["employee_id"], entry["report_key"]),
+        }
@@ -0,0 +1,407 @@
+# services/work_queue.py
+"""
+Work queue for sharded audit execution.
+
+The coordinator (run_audit_for_multiple_employees with a work_queue) enqueues one task per
+(Employee ID, Report Key) group, sharded by a hash of the Report Key, and waits for all of them;
+any number of worker processes or hosts sharing the queue file consume tasks and write results
+back to the same file. Bedrock calls across all workers go through one global rate limit.
+
+Start workers with:
+    python -m services.work_queue [--queue PATH] [--shards 0,1,2,3] [--threads 8]
+
+--shards refers to the queue's own shard count (WORK_QUEUE_SHARDS when the file was created,
+stored in the file). A task whose worker died is handed out again after its lease expires, or
+marked failed once it has used up max_attempts.
+
+The queue file holds pickled DataFrames; only share it between trusted processes. Hosts must share
+a filesystem with working file locks (SQLite requirement). The queue uses SQLite's rollback journal,
+not WAL: WAL needs shared memory between the processes and does not work over a network filesystem.
+"""
+import argparse
+import hashlib
+import json
+import pickle
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+from config.settings import WORK_QUEUE_PATH, WORK_QUEUE_SHARDS, WORK_QUEUE_LEASE_S, BEDROCK_MAX_RPS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id        TEXT NOT NULL,
+    shard         INTEGER NOT NULL,
+    employee_id   TEXT NOT NULL,
+    report_key    TEXT NOT NULL,
+    payload       BLOB NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'queued',   -- queued | running | done | failed | cancelled
+    worker        TEXT,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    claimed_at    REAL,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, shard, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_run ON tasks (run_id, status);
+CREATE TABLE IF NOT EXISTS results (
+    task_id         INTEGER PRIMARY KEY REFERENCES tasks (id),
+    run_id          TEXT NOT NULL,
+    result          TEXT NOT NULL,
+    worker          TEXT NOT NULL,
+    finished_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id);
+CREATE TABLE IF NOT EXISTS rate_limit (
+    id       INTEGER PRIMARY KEY CHECK (id = 1),
+    next_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL
+);
+"""
+
+LEASE_EXPIRED_ERROR = "lease expired (worker stopped responding)"
+
+
+def shard_for(report_key, n_shards: int = WORK_QUEUE_SHARDS) -> int:
+    """Stable shard of a Report Key (same on every host and Python process)."""
+    digest = hashlib.sha1(str(report_key).encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % n_shards
+
+
+class WorkQueue(ABC):
+    """Interface the audit coordinator and workers program against."""
+
+    @abstractmethod
+    def enqueue(self, run_id: str, tasks: Iterable[dict]) -> List[int]:
+        """Adds one task per group dict (employee_id, report_key, df_emp, ...). Returns the task IDs."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, shards: Optional[Iterable[int]] = None,
+              run_id: Optional[str] = None) -> Optional[dict]:
+        """Leases the next queued (or abandoned) task to worker_id; None if there is none."""
+
+    @abstractmethod
+    def complete(self, task_id: int, worker_id: str, result: dict) -> None:
+        """Stores the task's result and marks it done."""
+
+    @abstractmethod
+    def fail(self, task_id: int, worker_id: str, error: str) -> None:
+        """Requeues the task, or marks it failed once it has used up its attempts."""
+
+    @abstractmethod
+    def cancel_queued(self, run_id: str) -> int:
+        """Cancels the run's tasks nobody is working on. Returns how many."""
+
+    @abstractmethod
+    def outstanding(self, run_id: str) -> int:
+        """Tasks of run_id still queued or running."""
+
+    @abstractmethod
+    def results(self, run_id: str) -> dict:
+        """{task_id: result dict} for finished tasks of run_id."""
+
+    @abstractmethod
+    def failures(self, run_id: str) -> List[tuple]:
+        """(employee_id, report_key, error) of the run's failed tasks."""
+
+    @abstractmethod
+    def acquire_rate_slot(self, max_rps: Optional[float] = BEDROCK_MAX_RPS) -> None:
+        """Blocks until this process may start one Bedrock call under the global max_rps."""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue stored in one SQLite file (tasks, results and the global rate limiter).
+    Tasks claimed by a worker that has not finished within `lease_s` are handed out again, or
+    marked failed if they have used up max_attempts.
+    The shard count is fixed when the file is created; n_shards=None uses the stored one, and a
+    different explicit n_shards raises ValueError.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, n_shards: Optional[int] = None,
+                 lease_s: float = WORK_QUEUE_LEASE_S, max_attempts: int = 3):
+        self.path = Path(path or WORK_QUEUE_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        conn = self._conn()
+        # rollback journal: unlike WAL it only needs file locks, so the file can be shared between hosts
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.executescript(_SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('n_shards', ?)",
+                         (str(n_shards or WORK_QUEUE_SHARDS),))
+            stored = int(conn.execute("SELECT value FROM meta WHERE key = 'n_shards'").fetchone()[0])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if n_shards is not None and n_shards != stored:
+            raise ValueError(f"Queue {self.path} has {stored} shards, not {n_shards}")
+        self.n_shards = stored
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; explicit transactions via BEGIN IMMEDIATE
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, run_id: str, tasks: Iterable[dict]) -> List[int]:
+        conn = self._conn()
+        ids = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for t in tasks:
+                payload = pickle.dumps({"df_emp": t["df_emp"], "findings_text": t.get("findings_text", ""),
+                                       "output_mode": t.get("output_mode")})
+                cur = conn.execute(
+                    "INSERT INTO tasks (run_id, shard, employee_id, report_key, payload) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, shard_for(t["report_key"], self.n_shards), str(t["employee_id"]),
+                     str(t["report_key"]), payload),
+                )
+                ids.append(cur.lastrowid)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def claim(self, worker_id: str, shards: Optional[Iterable[int]] = None,
+              run_id: Optional[str] = None) -> Optional[dict]:
+        conn = self._conn()
+        where = ["(status = 'queued' OR (status = 'running' AND claimed_at < ?))", "attempts < ?"]
+        params: list = [time.time() - self.lease_s, self.max_attempts]
+        if shards is not None:
+            shards = list(shards)
+            where.append(f"shard IN ({','.join('?' * len(shards))})")
+            params += shards
+        if run_id:
+            where.append("run_id = ?")
+            params.append(run_id)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._reap_expired(conn)
+            row = conn.execute(
+                f"SELECT id, run_id, employee_id, report_key, payload FROM tasks WHERE {' AND '.join(where)} "
+                "ORDER BY id LIMIT 1", params
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?", (worker_id, time.time(), row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        payload = pickle.loads(row[4])
+        return {"task_id": row[0], "run_id": row[1], "employee_id": row[2], "report_key": row[3], **payload}
+
+    def complete(self, task_id: int, worker_id: str, result: dict) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            run_id = conn.execute("SELECT run_id FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO results (task_id, run_id, result, worker, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (task_id, run_id, json.dumps(result, default=str), worker_id, time.time()),
+            )
+            conn.execute("UPDATE tasks SET status = 'done', error = NULL WHERE id = ?", (task_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> None:
+        # back to the queue until max_attempts, then failed for good
+        self._conn().execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = ?, worker = ? WHERE id = ?",
+            (self.max_attempts, error[:2000], worker_id, task_id),
+        )
+
+    def _reap_expired(self, conn: sqlite3.Connection, run_id: Optional[str] = None) -> int:
+        """Marks tasks whose lease expired on their last attempt as failed (a reclaim would exceed max_attempts)."""
+        sql = ("UPDATE tasks SET status = 'failed', error = ? "
+               "WHERE status = 'running' AND claimed_at < ? AND attempts >= ?")
+        params: list = [LEASE_EXPIRED_ERROR, time.time() - self.lease_s, self.max_attempts]
+        if run_id:
+            sql += " AND run_id = ?"
+            params.append(run_id)
+        return conn.execute(sql, params).rowcount
+
+    def cancel_queued(self, run_id: str) -> int:
+        """Cancels queued tasks and running ones whose lease expired (their worker is gone)."""
+        cur = self._conn().execute(
+            "UPDATE tasks SET status = 'cancelled' WHERE run_id = ? "
+            "AND (status = 'queued' OR (status = 'running' AND claimed_at < ?))",
+            (run_id, time.time() - self.lease_s),
+        )
+        return cur.rowcount
+
+    def outstanding(self, run_id: str) -> int:
+        conn = self._conn()
+        self._reap_expired(conn, run_id)
+        return conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE run_id = ? AND status IN ('queued', 'running')", (run_id,)
+        ).fetchone()[0]
+
+    def results(self, run_id: str) -> dict:
+        """{task_id: result dict} for finished tasks of run_id."""
+        rows = self._conn().execute("SELECT task_id, result FROM results WHERE run_id = ?", (run_id,)).fetchall()
+        return {task_id: json.loads(result) for task_id, result in rows}
+
+    def failures(self, run_id: str) -> List[tuple]:
+        """(employee_id, report_key, error) of the run's failed tasks."""
+        return self._conn().execute(
+            "SELECT employee_id, report_key, error FROM tasks WHERE run_id = ? AND status = 'failed'", (run_id,)
+        ).fetchall()
+
+    def acquire_rate_slot(self, max_rps: Optional[float] = BEDROCK_MAX_RPS) -> None:
+        """Blocks until this process may start one Bedrock call under the global max_rps."""
+        if not max_rps:
+            return
+        interval = 1.0 / max_rps
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT next_at FROM rate_limit WHERE id = 1").fetchone()
+            slot = max(now, row[0] if row else now)
+            conn.execute("INSERT OR REPLACE INTO rate_limit (id, next_at) VALUES (1, ?)", (slot + interval,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _RateLimitedRuntime:
+    """bedrock-runtime stand-in that calls acquire() before every model request of the wrapped client."""
+
+    def __init__(self, runtime, acquire):
+        self._runtime = runtime
+        self._acquire = acquire
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        self._acquire()
+        return self._runtime.invoke_model_with_response_stream(**kwargs)
+
+    def invoke_model(self, **kwargs):
+        self._acquire()
+        return self._runtime.invoke_model(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._runtime, name)
+
+
+def run_worker(queue: WorkQueue, bedrock_runtime, shards: Optional[Iterable[int]] = None,
+               run_id: Optional[str] = None, threads: int = 8, idle_exit_s: Optional[float] = 30.0,
+               stop_event: Optional[threading.Event] = None) -> int:
+    """
+    Claims and audits tasks until the queue stays empty for idle_exit_s (None = run until
+    stop_event is set). Every Bedrock request (tiered screening and escalation calls, client-pool
+    retries) first takes a slot of the queue's global rate limit. Returns the number of tasks this
+    worker completed.
+    """
+    from services.auditor import audit_single_employee
+
+    pool_gate = None
+    if hasattr(bedrock_runtime, "call_gate"):
+        # a client pool gates each endpoint request itself, so its retries are counted too
+        pool_gate, bedrock_runtime.call_gate = bedrock_runtime.call_gate, queue.acquire_rate_slot
+        runtime = bedrock_runtime
+    else:
+        runtime = _RateLimitedRuntime(bedrock_runtime, queue.acquire_rate_slot)
+
+    shards = list(shards) if shards is not None else None
+    worker_base = f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+    stop_event = stop_event or threading.Event()
+    done = [0]
+    lock = threading.Lock()
+
+    def loop(n: int):
+        worker_id = f"{worker_base}-{n}"
+        idle_since = time.monotonic()
+        while not stop_event.is_set():
+            task = queue.claim(worker_id, shards=shards, run_id=run_id)
+            if task is None:
+                if idle_exit_s is not None and time.monotonic() - idle_since > idle_exit_s:
+                    return
+                time.sleep(0.5)
+                continue
+            idle_since = time.monotonic()
+            try:
+                result = audit_single_employee(task["employee_id"], task["report_key"], task["df_emp"],
+                                               runtime, run_id=task["run_id"],
+                                               output_mode=task.get("output_mode"),
+                                               findings_text=task["findings_text"])
+                queue.complete(task["task_id"], worker_id, result)
+                with lock:
+                    done[0] += 1
+            except Exception as e:
+                print(f"❌ Task {task['task_id']} failed on {worker_id}: {e}")
+                queue.fail(task["task_id"], worker_id, repr(e))
+
+    workers = [threading.Thread(target=loop, args=(i,), daemon=True) for i in range(threads)]
+    try:
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+    finally:
+        if runtime is bedrock_runtime:
+            bedrock_runtime.call_gate = pool_gate
+    return done[0]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Consume audit tasks from the shared work queue.")
+    parser.add_argument("--queue", help=f"Queue file (default: {WORK_QUEUE_PATH})")
+    parser.add_argument("--shards", help="Comma-separated shard numbers to consume, out of the queue's "
+                                         f"shard count (default: all; new queues get {WORK_QUEUE_SHARDS})")
+    parser.add_argument("--of", type=int, help="Expected shard count; refuse to start if the queue has another")
+    parser.add_argument("--run-id", help="Only consume tasks of this run")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent Bedrock calls in this worker")
+    parser.add_argument("--idle-exit", type=float, default=30.0,
+                        help="Exit after this many idle seconds (0 = never)")
+    args = parser.parse_args(argv)
+
+    try:
+        queue = SQLiteWorkQueue(args.queue, n_shards=args.of)
+    except ValueError as e:
+        parser.error(str(e))
+    shards = [int(s) for s in args.shards.split(",")] if args.shards else None
+    if shards and not all(0 <= s < queue.n_shards for s in shards):
+        parser.error(f"--shards must be between 0 and {queue.n_shards - 1} (the queue has {queue.n_shards} shards)")
+
+    from services.bedrock_client import init_bedrock_runtime
+    bedrock = init_bedrock_runtime()
+    if not bedrock:
+        return 1
+
+    count = run_worker(queue, bedrock, shards=shards, run_id=args.run_id, threads=args.threads,
+                       idle_exit_s=args.idle_exit or None)
+    print(f"✅ Worker finished {count} tasks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
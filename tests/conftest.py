@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# tests import the app modules the same way `python -m services.X` does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
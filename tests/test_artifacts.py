@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from services import artifacts  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _artifacts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACTS_DIR", tmp_path / "artifacts")
+
+
+def _frame():
+    return pd.DataFrame({
+        "Original Row": [9, 10, 11],
+        "Employee ID": pd.Categorical(["E1", "E1", "E2"]),
+        "Transaction Date": pd.to_datetime(["2024-03-01", "2024-03-02", None]),
+        "Approved Amount (rpt)": [20.0, 35.5, 120.0],
+        "Entry Comment(s)": ["lunch", None, "taxi"],
+        # numbers and text in one column: Arrow can't store it, so it goes to the side pickle
+        "Request ID(s)": [1234, "REQ-77", 5.5],
+    }, index=[7, 8, 9])
+
+
+def test_frame_round_trips_with_mixed_type_column():
+    df = _frame()
+    path = artifacts.save_frame(df, "run1", "clean")
+
+    assert path.endswith("clean.arrow")
+    assert (artifacts.run_dir("run1") / "clean.extra.pkl").exists()
+    loaded = artifacts.load_frame("run1", "clean")
+    pd.testing.assert_frame_equal(loaded, df)
+    assert loaded["Request ID(s)"].tolist() == [1234, "REQ-77", 5.5]
+
+
+def test_arrow_only_frame_has_no_side_pickle():
+    df = _frame().drop(columns=["Request ID(s)"])
+    artifacts.save_frame(df, "run1", "clean")
+    assert not (artifacts.run_dir("run1") / "clean.extra.pkl").exists()
+    pd.testing.assert_frame_equal(artifacts.load_frame("run1", "clean"), df)
+
+
+def test_missing_stage_raises():
+    with pytest.raises(FileNotFoundError):
+        artifacts.load_frame("run1", "flagged")
+
+
+def test_saved_stages_rerun_the_later_stages(monkeypatch):
+    import services.report_writer as report_writer
+
+    df = _frame()
+    flagged = df.assign(**{"Audit Flag": ["Violation", "", ""]})
+    for run_id in ("run1", "run2"):
+        artifacts.save_frame(df, run_id, "original")
+        artifacts.save_frame(df, run_id, "clean")
+    artifacts.save_frame(flagged, "run1", "flagged")
+    artifacts.save_audit_results("run1", [{"employee_id": "E1", "report_key": "R1", "response": "ok"}])
+
+    assert artifacts.list_runs() == [
+        {"run_id": "run1", "stages": ["clean", "flagged", "original"], "audited": True},
+        {"run_id": "run2", "stages": ["clean", "original"], "audited": False},
+    ]
+    assert artifacts.latest_run("flagged") == "run1"
+
+    calls = {}
+    monkeypatch.setattr(report_writer, "write_reports",
+                        lambda original, flagged, results: calls.setdefault("render", (original, flagged, results)))
+    monkeypatch.setattr(report_writer, "audit_and_flag",
+                        lambda original, clean, runtime, persist: calls.setdefault("audit", (original, clean)))
+
+    artifacts.rerender()
+    original, rendered, results = calls["render"]
+    pd.testing.assert_frame_equal(rendered, flagged)
+    assert results[0]["response"] == "ok"
+
+    artifacts.reaudit(bedrock_runtime=object())
+    pd.testing.assert_frame_equal(calls["audit"][1], df)
@@ -0,0 +1,159 @@
+"""BedrockClientPool against local stub endpoints (real boto3 clients over HTTP, no AWS)."""
+import base64
+import binascii
+import json
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("boto3")
+
+from services.bedrock_client import BedrockClientPool  # noqa: E402
+
+
+def _event(payload: dict) -> bytes:
+    """One AWS event-stream message carrying a Bedrock "chunk" event."""
+    headers = b""
+    for name, value in ((":event-type", "chunk"), (":message-type", "event"), (":content-type", "application/json")):
+        headers += bytes([len(name)]) + name.encode() + b"\x07" + struct.pack(">H", len(value)) + value.encode()
+    body = json.dumps({"bytes": base64.b64encode(json.dumps(payload).encode()).decode()}).encode()
+    total = 12 + len(headers) + len(body) + 4
+    prelude = struct.pack(">II", total, len(headers))
+    message = prelude + struct.pack(">I", binascii.crc32(prelude)) + headers + body
+    return message + struct.pack(">I", binascii.crc32(message))
+
+
+class StubEndpoint:
+    """
+    Local bedrock-runtime stand-in. mode "ok" streams one text delta, "throttle" answers 429
+    ThrottlingException, "unavailable" answers 503 ServiceUnavailableException, and requests signed with an access key in `expired_keys` get ExpiredTokenException.
+    """
+
+    def __init__(self, mode="ok", expired_keys=()):
+        self.mode = mode
+        self.expired_keys = set(expired_keys)
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests += 1
+                auth = self.headers.get("Authorization", "")
+                if any(f"Credential={key}/" in auth for key in stub.expired_keys):
+                    return self._error(403, "ExpiredTokenException")
+                if stub.mode == "throttle":
+                    return self._error(429, "ThrottlingException")
+                if stub.mode == "unavailable":
+                    return self._error(503, "ServiceUnavailableException")
+                data = _event({"type": "content_block_delta", "delta": {"text": f"served by {stub.name}"}})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _error(self, status, code):
+                data = json.dumps({"message": code}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("x-amzn-ErrorType", f"{code}:")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.name = self.url
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(**kwargs):
+        stub = StubEndpoint(**kwargs)
+        created.append(stub)
+        return stub
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def _invoke(pool):
+    response = pool.invoke_model_with_response_stream(modelId="m", body="{}", accept="application/json",
+                                                      contentType="application/json")
+    return "".join(json.loads(e["chunk"]["bytes"])["delta"]["text"] for e in response["body"] if "chunk" in e)
+
+
+def _creds(key="AKIDFRESH"):
+    return {"aws_access_key_id": key, "aws_secret_access_key": "secret"}
+
+
+def test_throttled_endpoint_fails_over_and_cools_down(stubs):
+    busy, ok = stubs(mode="throttle"), stubs()
+    pool = BedrockClientPool([{"endpoint_url": busy.url}, {"endpoint_url": ok.url}],
+                             credentials_provider=_creds, cooldown_s=60)
+
+    assert _invoke(pool) == f"served by {ok.url}"
+    assert _invoke(pool) == f"served by {ok.url}"
+    # the throttled endpoint is skipped while it cools down
+    assert busy.requests <= 1
+    by_name = {s["endpoint"]: s for s in pool.stats()}
+    assert by_name[busy.url]["cooling_s"] > 0
+    assert by_name[ok.url]["calls"] == 2
+
+
+def test_unavailable_endpoint_fails_over_without_reporting_a_throttle(stubs):
+    down, ok = stubs(mode="unavailable"), stubs()
+    pool = BedrockClientPool([{"endpoint_url": down.url}, {"endpoint_url": ok.url}],
+                             credentials_provider=_creds, cooldown_s=60)
+    events = []
+    pool.add_listener(lambda event, endpoint: events.append(event))
+
+    assert _invoke(pool) == f"served by {ok.url}"
+    assert events == []
+    by_name = {s["endpoint"]: s for s in pool.stats()}
+    assert by_name[down.url]["errors"] == 1 and by_name[down.url]["cooling_s"] > 0
+
+
+def test_expired_token_refreshes_credentials(stubs):
+    ok = stubs(expired_keys={"AKIDOLD"})
+    keys = iter(["AKIDOLD", "AKIDNEW"])
+    pool = BedrockClientPool([{"endpoint_url": ok.url}], credentials_provider=lambda: _creds(next(keys)))
+
+    assert _invoke(pool) == f"served by {ok.url}"
+    assert pool.refreshes == 1
+
+
+def test_slot_is_held_until_the_stream_is_read(stubs):
+    ok = stubs()
+    pool = BedrockClientPool([{"endpoint_url": ok.url}], credentials_provider=_creds)
+
+    response = pool.invoke_model_with_response_stream(modelId="m", body="{}", accept="application/json",
+                                                      contentType="application/json")
+    assert pool.stats()[0]["in_flight"] == 1
+    list(response["body"])
+    assert pool.stats()[0]["in_flight"] == 0
+
+
+def test_call_gate_runs_before_every_endpoint_request(stubs):
+    busy, ok = stubs(mode="throttle"), stubs()
+    gate = []
+    pool = BedrockClientPool([{"endpoint_url": busy.url}, {"endpoint_url": ok.url}],
+                             credentials_provider=_creds, cooldown_s=60, call_gate=lambda: gate.append(1))
+
+    _invoke(pool)
+    assert (busy.requests, ok.requests) == (1, 1)
+    assert len(gate) == 2
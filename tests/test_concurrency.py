@@ -0,0 +1,79 @@
+import pandas as pd
+from botocore.exceptions import ClientError
+
+import services.auditor as auditor
+from services.concurrency import AIMDController
+from services.run_metrics import RunMetrics
+
+
+def _throttle():
+    return ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}},
+                       "InvokeModelWithResponseStream")
+
+
+class ThrottlingPool:
+    """Client-pool stand-in: reports every throttle to its listeners, then raises it."""
+
+    def __init__(self, throttles):
+        self.throttles = throttles
+        self.listeners = []
+
+    def add_listener(self, fn):
+        self.listeners.append(fn)
+
+    def remove_listener(self, fn):
+        self.listeners.remove(fn)
+
+
+def _task(employee_id="E1"):
+    return {"employee_id": employee_id, "report_key": "R1", "df_emp": pd.DataFrame(), "findings_text": ""}
+
+
+def test_each_throttle_is_counted_once(monkeypatch):
+    pool = ThrottlingPool(throttles=2)
+
+    def fake_audit(*args, **kwargs):
+        if pool.throttles:
+            pool.throttles -= 1
+            for listener in pool.listeners:
+                listener("throttle", "endpoint")
+            raise _throttle()
+        return {"violation_rows": [], "exception_rows": []}
+
+    monkeypatch.setattr(auditor, "audit_single_employee", fake_audit)
+    monkeypatch.setattr(auditor.time, "sleep", lambda s: None)
+    controller = AIMDController(initial=8, min_window=1, max_window=8)
+
+    done = auditor._dispatch([_task()], pool, "run", None, None, controller=controller)
+
+    assert len(done) == 1
+    assert controller.throttles == 2
+
+
+def test_window_grows_on_success_and_halves_on_throttle():
+    controller = AIMDController(initial=8, min_window=1, max_window=64)
+    for _ in range(8):
+        assert controller.acquire()
+        controller.release("ok", ttft=0.1)
+    assert controller.window > 8
+    grown = controller.window
+    controller.on_throttle()
+    assert controller.window == grown * 0.5
+
+
+def test_a_failing_group_does_not_abort_the_others(monkeypatch):
+    def fake_audit(employee_id, *args, **kwargs):
+        if employee_id == "E2":
+            raise RuntimeError("model exploded")
+        return {"employee_id": employee_id, "violation_rows": [], "exception_rows": []}
+
+    monkeypatch.setattr(auditor, "audit_single_employee", fake_audit)
+    controller = AIMDController(initial=8, min_window=1, max_window=8)
+    metrics = RunMetrics("run")
+
+    done = auditor._dispatch([_task("E1"), _task("E2"), _task("E3")], object(), "run", None, None,
+                             controller=controller, metrics=metrics)
+
+    assert [task["employee_id"] for task, _ in done] == ["E1", "E3"]
+    assert metrics.get("failed_groups") == [{"employee_id": "E2", "report_key": "R1", "error": "model exploded"}]
+    assert controller.errors == 1
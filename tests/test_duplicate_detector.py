@@ -0,0 +1,42 @@
+import pandas as pd
+
+from services.duplicate_detector import find_split_transactions
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["Original Row", "Employee ID", "Report Key", "Expense Type", "Vendor",
+                                       "Approved Amount (rpt)", "Transaction Date"])
+
+
+def test_under_cap_charges_summing_past_the_cap_are_a_split():
+    df = _frame([(10, "E1", "R1", "Supplies", "Acme", 50.0, "2024-03-01"),
+                 (11, "E1", "R2", "Supplies", "Acme", 40.0, "2024-03-02")])
+    assert sorted(find_split_transactions(df)["Original Row"]) == [10, 11]
+
+
+def test_identical_lines_on_one_report_are_not_a_split():
+    df = _frame([(10, "E1", "R1", "Supplies", "Acme", 50.0, "2024-03-01"),
+                 (11, "E1", "R1", "Supplies", "Acme", 50.0, "2024-03-01")])
+    assert find_split_transactions(df).empty
+
+
+def test_group_meals_and_accommodation_are_excluded():
+    df = _frame([(10, "E1", "R1", "Team/Group Meals", "Diner", 60.0, "2024-03-01"),
+                 (11, "E1", "R2", "Team/Group Meals", "Diner", 70.0, "2024-03-01"),
+                 (12, "E1", "R1", "Other Accommodation (Group Only)", "Inn", 60.0, "2024-03-01"),
+                 (13, "E1", "R2", "Other Accommodation (Group Only)", "Inn", 70.0, "2024-03-02")])
+    assert find_split_transactions(df).empty
+
+
+def test_meals_on_consecutive_days_are_not_a_split():
+    df = _frame([(10, "E1", "R1", "Meals", "Diner", 50.0, "2024-03-01"),
+                 (11, "E1", "R2", "Meals", "Diner", 45.0, "2024-03-02")])
+    assert find_split_transactions(df).empty
+
+
+def test_meals_over_the_daily_cap_on_one_day_are_a_split():
+    df = _frame([(10, "E1", "R1", "Meals", "Diner", 50.0, "2024-03-01"),
+                 (11, "E1", "R2", "Meals", "Diner", 45.0, "2024-03-01")])
+    split = find_split_transactions(df)
+    assert sorted(split["Original Row"]) == [10, 11]
+    assert split["Detail"].str.endswith("on one day").all()
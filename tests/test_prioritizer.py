@@ -0,0 +1,70 @@
+import time
+
+import pandas as pd
+
+import services.auditor as auditor
+from services.concurrency import AIMDController
+from services.prioritizer import dollar_coverage, score_groups, select_groups
+
+
+def _df():
+    return pd.DataFrame({
+        "Employee ID": ["E1", "E2", "E3", "E4"],
+        "Report Key": ["R1", "R2", "R3", "R4"],
+        "Approved Amount (rpt)": [100.0, 400.0, 200.0, 300.0],
+        "Trip Type": ["Domestic", "Domestic", "International", "Domestic"],
+        "Active/Term Date": ["Active", "Active", "Active", None],
+        "Transaction Date": ["2024-03-01"] * 4,
+        "First Submitted Date": ["2024-03-05", "2024-03-05", "2024-03-05", "2024-03-05"],
+    })
+
+
+def test_employee_missing_from_ee_active_scores_as_inactive():
+    scores = score_groups(_df())
+    assert scores.loc[("E4", "R4"), "inactive"]
+    assert not scores.loc[("E1", "R1"), "inactive"]
+
+
+def test_score_combines_weighted_features():
+    scores = score_groups(_df(), weights={"amount": 1.0, "international": 0.5, "inactive": 0.75, "late": 0.0})
+    # amount rank 0.75 + inactive 0.75 beats amount rank 1.0 and amount rank 0.5 + international 0.5
+    assert select_groups(scores) == [("E4", "R4"), ("E2", "R2"), ("E3", "R3"), ("E1", "R1")]
+    assert scores.loc[("E4", "R4"), "score"] == 1.5
+
+
+def test_weights_change_the_order():
+    scores = score_groups(_df(), weights={"amount": 0.0, "international": 2.0, "inactive": 0.0, "late": 0.0})
+    assert select_groups(scores, 1) == [("E3", "R3")]
+
+
+def test_late_submission_raises_the_score():
+    df = _df()
+    df.loc[0, "First Submitted Date"] = "2024-06-01"
+    scores = score_groups(df, weights={"amount": 0.0, "international": 0.0, "inactive": 0.0, "late": 1.0})
+    assert select_groups(scores, 1) == [("E1", "R1")]
+    assert scores.loc[("E1", "R1"), "score"] == 1.0
+
+
+def test_select_groups_and_coverage():
+    scores = score_groups(_df())
+    top = select_groups(scores, 2)
+    assert len(top) == 2 and select_groups(scores) == list(scores.index)
+    assert dollar_coverage(scores, top) == scores.loc[top, "amount"].sum() / 1000.0
+
+
+def test_groups_not_started_by_the_deadline_are_dropped(monkeypatch):
+    started = []
+
+    def slow_audit(employee_id, *args, **kwargs):
+        started.append(employee_id)
+        time.sleep(0.3)
+        return {"employee_id": employee_id, "violation_rows": [], "exception_rows": []}
+
+    monkeypatch.setattr(auditor, "audit_single_employee", slow_audit)
+    tasks = [{"employee_id": e, "report_key": "R", "df_emp": pd.DataFrame(), "findings_text": ""} for e in "ABC"]
+
+    # one slot: A runs past the deadline, so B and C never start
+    done = auditor._dispatch(tasks, object(), "run", None, time.monotonic() + 0.1,
+                             controller=AIMDController(initial=1, min_window=1, max_window=1))
+    assert [task["employee_id"] for task, _ in done] == ["A"]
+    assert started == ["A"]
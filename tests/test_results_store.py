@@ -0,0 +1,55 @@
+import sqlite3
+
+import pandas as pd
+
+from services.results_store import monthly_trend, query_lines, record_run, repeat_offenders
+
+
+def _flagged(flags):
+    # rows 10 and 11 are the same charge twice on one day (two real lines)
+    return pd.DataFrame({
+        "Original Row": [10, 11, 12],
+        "Employee ID": ["E1", "E1", "E1"],
+        "Report Key": ["R1", "R1", "R2"],
+        "Employee Department": ["D1", "D1", "D1"],
+        "Expense Type": ["Meals", "Meals", "Airfare"],
+        "Transaction Date": ["2024-03-01", "2024-03-01", "2024-04-02"],
+        "Approved Amount (rpt)": [20.0, 20.0, 300.0],
+        "Audit Flag": flags,
+    })
+
+
+def test_latest_verdict_per_line(tmp_path):
+    store = tmp_path / "results.sqlite"
+    record_run("run1", _flagged(["Violation", "Violation", "Violation"]), store_path=store)
+    record_run("run2", _flagged(["", "Violation", "Violation"]), store_path=store)
+
+    latest = query_lines(latest_only=True, store_path=store)
+    assert latest["run_id"].tolist() == ["run2"] * 3
+    assert latest["flag"].tolist() == ["", "Violation", "Violation"]
+    assert len(query_lines(store_path=store)) == 6
+    assert monthly_trend(store_path=store) == {"2024-03": 1, "2024-04": 1}
+    assert repeat_offenders(store_path=store) == {"E1": 2}
+
+
+def test_latest_queries_use_the_partial_index(tmp_path):
+    store = tmp_path / "results.sqlite"
+    record_run("run1", _flagged(["Violation", "", ""]), store_path=store)
+    conn = sqlite3.connect(str(store))
+    plan = " ".join(str(r) for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM latest_lines WHERE employee_id = 'E1' AND period >= '2024-01'"))
+    conn.close()
+    assert "idx_latest_employee" in plan
+
+
+def test_reexported_lines_count_once(tmp_path):
+    store = tmp_path / "results.sqlite"
+    record_run("run1", _flagged(["Violation", "", "Violation"]), store_path=store)
+    # the same report re-exported with two new lines on top: every row moved down by two
+    shifted = _flagged(["Violation", "", "Violation"])
+    shifted["Original Row"] += 2
+    record_run("run2", shifted, store_path=store)
+
+    latest = query_lines(latest_only=True, store_path=store)
+    assert latest["run_id"].tolist() == ["run2"] * 3
+    assert monthly_trend(store_path=store) == {"2024-03": 1, "2024-04": 1}
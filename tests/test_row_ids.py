@@ -0,0 +1,52 @@
+import json
+
+import pandas as pd
+
+import services.auditor as auditor
+
+
+class ScriptedRuntime:
+    """Bedrock runtime stand-in: streams a fixed answer and keeps the prompts it was sent."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.prompts = []
+
+    def invoke_model_with_response_stream(self, body, **kwargs):
+        self.prompts.append(json.loads(body)["messages"][0]["content"])
+        chunk = json.dumps({"delta": {"text": self.answer}}).encode()
+        return {"body": [{"chunk": {"bytes": chunk}}]}
+
+
+def test_map_local_rows_rejects_ids_outside_the_group():
+    rows, rejected = auditor.map_local_rows([2, 1, 2, 7, 0], [105, 230, 231])
+    assert rows == [230, 105]
+    assert rejected == [7, 0]
+
+
+def test_row_id_legend_lists_every_mapping():
+    assert auditor.row_id_legend([105, 230]) == "\n\n[Row ID = Original Row: 1=105, 2=230]"
+
+
+def test_model_row_ids_are_mapped_back_to_original_rows(monkeypatch):
+    saved = {}
+    monkeypatch.setattr(auditor, "TIERED_AUDIT", False)
+    monkeypatch.setattr(auditor, "save_group_response",
+                        lambda employee_id, report_key, text, **kwargs: saved.setdefault("text", text))
+    df_emp = pd.DataFrame({
+        "Original Row": [105, 230, 231],
+        "Employee ID": ["E1"] * 3,
+        "Report Key": ["R1"] * 3,
+        "Expense Type": ["Airfare", "Hotel", "Meals"],
+        "Approved Amount (rpt)": [420.0, 180.0, 95.0],
+    })
+    runtime = ScriptedRuntime("Violation Rows: 2, 9\nException Rows: 3")
+
+    result = auditor.audit_single_employee("E1", "R1", df_emp, runtime, policy_path="missing.txt")
+
+    prompt = runtime.prompts[0]
+    assert "Row ID" in prompt and "105" not in prompt
+    assert result["violation_rows"] == [230]
+    assert result["exception_rows"] == [231]
+    assert result["rejected_ids"] == [9]
+    assert saved["text"].endswith("[Row ID = Original Row: 1=105, 2=230, 3=231]")
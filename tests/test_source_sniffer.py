@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from openpyxl import Workbook  # noqa: E402
+
+from services.io_loader import load_excel_file  # noqa: E402
+from services.source_sniffer import (EXPENSE_HEADER_COLUMNS, SOURCE_SIGNATURES, classify_sources,  # noqa: E402
+                                     find_header_row, locate_header, sniff_source)
+
+TITLE_LINES = [("Expense Type Detail",), ("Run by: auditor",), (None,), ("Filters: Fiscal Year = 2024",)]
+
+
+def _write(path, sheets):
+    """Writes {sheet title: rows} to an .xlsx and returns its path."""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(list(row))
+    wb.save(path)
+    return path
+
+
+def _expense_rows():
+    header = SOURCE_SIGNATURES["Expense Type Detail"]
+    data = [("E1", "R1", "2024-03-01", "Airfare", 420.0, "Q1"),
+            ("E1", "R1", "2024-03-03", "Hotel", 180.0, "Q1")]
+    return TITLE_LINES + [tuple(header)] + data
+
+
+def test_find_header_row_normalizes_wrapped_names():
+    rows = [("Report",), ("Employee\nID", " Report Key ", "Expense  Type", "Approved Amount (rpt)")]
+    assert find_header_row(rows, EXPENSE_HEADER_COLUMNS) == 1
+    assert find_header_row(rows[:1], EXPENSE_HEADER_COLUMNS) is None
+
+
+def test_sources_are_recognized_by_columns_not_file_names(tmp_path):
+    expense = _write(tmp_path / "download (3).xlsx", {"Sheet1": _expense_rows()})
+    risk = _write(tmp_path / "export.xlsx", {
+        "Cover": [("Risk report",)],
+        "Data": [("Risk International Travel",), tuple(SOURCE_SIGNATURES["Risk International Travel"])],
+    })
+    unknown = _write(tmp_path / "notes.xlsx", {"Sheet1": [("just", "some", "notes")]})
+
+    assert sniff_source(expense) == {"source": "Expense Type Detail", "sheet": "Sheet1", "header": 4}
+    assert sniff_source(risk) == {"source": "Risk International Travel", "sheet": "Data", "header": 1}
+    assert sniff_source(unknown) is None
+    assert classify_sources([unknown, risk, expense]) == {
+        "Risk International Travel": str(risk), "Expense Type Detail": str(expense)}
+
+
+def test_combined_report_matches_the_longest_signature(tmp_path):
+    columns = sorted({c for cols in SOURCE_SIGNATURES.values() for c in cols})
+    combined = _write(tmp_path / "master.xlsx", {"Sheet1": [tuple(columns)]})
+    assert sniff_source(combined)["source"] == "Expense Type Detail"
+
+
+def test_shifted_header_keeps_original_row_on_the_excel_row(tmp_path):
+    path = _write(tmp_path / "etd.xlsx", {"Sheet1": _expense_rows()})
+    assert locate_header(path, EXPENSE_HEADER_COLUMNS) == {"sheet": "Sheet1", "header": 4}
+
+    df = load_excel_file(path)
+    assert list(df["Expense Type"]) == ["Airfare", "Hotel"]
+    # header on Excel row 5, so the data starts on row 6 ('Original Row' = index + 2)
+    assert list(df.index + 2) == [6, 7]
@@ -0,0 +1,98 @@
+import json
+import re
+
+import pandas as pd
+import pytest
+
+import services.auditor as auditor
+from services.prompt_builder import create_audit_prompt
+from services.run_metrics import RunMetrics
+
+# Screening answers per employee; the audit model always answers "clean"
+SCREEN_ANSWERS = {
+    "E1": "Violation Rows: None\nException Rows: None\nConfidence: 0.95",
+    "E2": "Violation Rows: None\nException Rows: None\nConfidence: 0.4",
+    "E3": "Violation Rows: 1\nException Rows: None\nConfidence: 0.95",
+    "E4": "Violation Rows: None\nException Rows: None",
+}
+
+
+class TieredRuntime:
+    """Answers by model: SCREEN_ANSWERS for the screening model, a clean verdict for the audit model."""
+
+    def __init__(self):
+        self.models = []
+
+    def invoke_model_with_response_stream(self, body, modelId, **kwargs):
+        self.models.append(modelId)
+        prompt = json.loads(body)["messages"][0]["content"]
+        employee = re.search(r"Employee ID = (E\d)", prompt).group(1)
+        text = (SCREEN_ANSWERS[employee] if modelId == auditor.SCREENING_MODEL_ID
+                else "Violation Rows: None\nException Rows: None")
+        return {"body": [{"chunk": {"bytes": json.dumps({"delta": {"text": text}}).encode()}}]}
+
+
+@pytest.fixture(autouse=True)
+def _tiered(monkeypatch):
+    monkeypatch.setattr(auditor, "TIERED_AUDIT", True)
+    monkeypatch.setattr(auditor, "ESCALATE_FLAGGED", True)
+    monkeypatch.setattr(auditor, "VERDICT_CACHE", False)
+    monkeypatch.setattr(auditor, "save_group_response", lambda *args, **kwargs: "nowhere")
+
+
+def _group(employee, first_row=10):
+    return pd.DataFrame({
+        "Original Row": [first_row, first_row + 1],
+        "Employee ID": [employee] * 2,
+        "Report Key": ["R1"] * 2,
+        "Expense Type": ["Airfare", "Hotel"],
+        "Approved Amount (rpt)": [420.0, 180.0],
+    })
+
+
+def _audit(employee):
+    runtime = TieredRuntime()
+    result = auditor.audit_single_employee(employee, "R1", _group(employee), runtime, policy_path="missing.txt")
+    return result, runtime.models
+
+
+def test_screening_prompt_asks_for_confidence_without_an_example_value():
+    prompt = create_audit_prompt("", "Row ID\n1\n", ask_confidence=True)
+    assert "Confidence: <0.0-1.0>" in prompt
+    assert auditor.extract_confidence(prompt) is None
+
+
+def test_confident_clean_screen_is_not_escalated():
+    result, models = _audit("E1")
+    assert models == [auditor.SCREENING_MODEL_ID]
+    assert result["escalation"] is None and result["confidence"] == 0.95
+
+
+@pytest.mark.parametrize("employee, reason", [("E2", "low_confidence"), ("E4", "low_confidence"),
+                                              ("E3", "flagged")])
+def test_unsure_or_flagging_screens_are_escalated(employee, reason):
+    result, models = _audit(employee)
+    assert models == [auditor.SCREENING_MODEL_ID, auditor.AUDIT_MODEL_ID]
+    assert result["escalation"] == reason
+    assert result["model_id"] == auditor.AUDIT_MODEL_ID
+
+
+def test_flagged_screen_is_kept_without_escalate_flagged(monkeypatch):
+    monkeypatch.setattr(auditor, "ESCALATE_FLAGGED", False)
+    result, models = _audit("E3")
+    assert models == [auditor.SCREENING_MODEL_ID]
+    assert result["violation_rows"] == [10]
+
+
+def test_run_metrics_count_escalations():
+    df = pd.concat([_group(e, first_row=10 * i) for i, e in enumerate(SCREEN_ANSWERS, start=1)], ignore_index=True)
+    metrics = RunMetrics("run")
+
+    auditor.run_audit_for_multiple_employees(df, TieredRuntime(), group_count=None, work_queue=False,
+                                             metrics=metrics)
+
+    assert metrics.get("screened") == 4
+    assert metrics.get("escalated") == 3
+    assert metrics.get("escalated_low_confidence") == 2
+    assert metrics.get("escalated_flagged") == 1
+    assert metrics.get("escalation_rate") == 0.75
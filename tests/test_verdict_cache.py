@@ -0,0 +1,78 @@
+import pandas as pd
+
+from services.results_store import row_reasons
+from services.verdict_cache import VerdictCache, group_signatures
+
+
+def _group(employee, report, first_row, start):
+    """Two-line trip: airfare on the start date, a hotel two days later."""
+    start = pd.Timestamp(start)
+    return pd.DataFrame({
+        "Original Row": [first_row, first_row + 1],
+        "Employee ID": [employee, employee],
+        "Report Key": [report, report],
+        "Expense Type": ["Airfare", "Hotel"],
+        "Approved Amount (rpt)": [420.0, 180.0],
+        "Travel Start Date": [start, start],
+        "Transaction Date": [start, start + pd.Timedelta(days=2)],
+    })
+
+
+def _audited(violation_rows, exception_rows=(), response="narrative", row_map=None):
+    return {"employee_id": "E1", "report_key": "R1", "response": response, "row_map": row_map,
+            "violation_rows": list(violation_rows), "exception_rows": list(exception_rows)}
+
+
+def test_identical_groups_share_a_signature_regardless_of_ids_and_dates():
+    df = pd.concat([_group("E1", "R1", 10, "2024-03-01"),
+                    _group("E2", "R9", 50, "2024-07-15")[::-1]])
+    signatures = group_signatures(df)
+    (sig_a, rows_a), (sig_b, rows_b) = signatures[("E1", "R1")], signatures[("E2", "R9")]
+    assert sig_a == sig_b
+    assert rows_a == [10, 11] and rows_b == [50, 51]
+
+
+def test_different_day_offsets_change_the_signature():
+    moved = _group("E2", "R9", 50, "2024-07-15")
+    moved.loc[1, "Transaction Date"] += pd.Timedelta(days=1)
+    signatures = group_signatures(pd.concat([_group("E1", "R1", 10, "2024-03-01"), moved]))
+    assert signatures[("E1", "R1")][0] != signatures[("E2", "R9")][0]
+
+
+def test_reuse_remaps_flags_onto_the_new_group_rows():
+    signatures = group_signatures(pd.concat([_group("E1", "R1", 10, "2024-03-01"),
+                                             _group("E2", "R9", 50, "2024-07-15")]))
+    (sig, rows_a), (_, rows_b) = signatures[("E1", "R1")], signatures[("E2", "R9")]
+    cache = VerdictCache()
+    cache.put(sig, rows_a, _audited(violation_rows=[11], exception_rows=[10]))
+
+    reused = cache.reuse(sig, "E2", "R9", rows_b)
+    assert reused["violation_rows"] == [51]
+    assert reused["exception_rows"] == [50]
+    assert reused["reused_from"] == ("E1", "R1")
+    assert cache.reused == 1
+
+
+def test_spot_check_disagreement_stops_reuse():
+    cache = VerdictCache()
+    cache.put("sig", [10, 11], _audited(violation_rows=[11]))
+
+    assert cache.check("sig", [50, 51], _audited(violation_rows=[51]))
+    assert not cache.check("sig", [50, 51], _audited(violation_rows=[]))
+    assert cache.disagreements == 1
+    assert cache.reuse("sig", "E3", "R3", [70, 71]) is None
+
+
+def test_reused_response_is_renumbered_to_the_new_group():
+    # the audited group listed its hotel first, so its Row ID 1 is canonical position 2
+    cache = VerdictCache()
+    narrative = "Violations:\n- Row 1: hotel above the nightly cap\nExceptions:\n- Row 2: airfare booked late"
+    cache.put("sig", [10, 11], _audited(violation_rows=[11], exception_rows=[10], response=narrative,
+                                        row_map=[11, 10]))
+
+    reused = cache.reuse("sig", "E2", "R9", [50, 51])
+    assert reused["row_map"] == [51, 50]
+    assert "Violation Rows: 1\nException Rows: 2" in reused["response"]
+    reasons = row_reasons([reused])
+    assert reasons[51] == "Row 1: hotel above the nightly cap"
+    assert reasons[50] == "Row 2: airfare booked late"
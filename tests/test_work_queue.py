@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import services.auditor as auditor
+from services.work_queue import LEASE_EXPIRED_ERROR, SQLiteWorkQueue, WorkQueue, run_worker
+
+
+def _tasks(n=1):
+    return [{"employee_id": f"E{i}", "report_key": f"R{i}", "df_emp": pd.DataFrame({"a": [i]})} for i in range(n)]
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
+
+
+def test_expired_lease_on_last_attempt_fails_the_task(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / "q.sqlite", lease_s=0.1, max_attempts=1)
+    queue.enqueue("run", _tasks())
+    assert queue.claim("dead-worker") is not None  # the worker dies without complete/fail
+    time.sleep(0.2)
+
+    assert queue.claim("other-worker") is None
+    assert queue.outstanding("run") == 0
+    assert queue.failures("run") == [("E0", "R0", LEASE_EXPIRED_ERROR)]
+
+
+def test_expired_lease_with_attempts_left_is_handed_out_again(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / "q.sqlite", lease_s=0.1, max_attempts=2)
+    queue.enqueue("run", _tasks())
+    first = queue.claim("dead-worker")
+    assert queue.claim("other-worker") is None  # lease still valid
+    time.sleep(0.2)
+
+    second = queue.claim("other-worker")
+    assert second["task_id"] == first["task_id"]
+    queue.complete(second["task_id"], "other-worker", {"violation_rows": [3]})
+    assert queue.outstanding("run") == 0
+    assert queue.results("run") == {first["task_id"]: {"violation_rows": [3]}}
+
+
+def test_fail_requeues_until_max_attempts(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / "q.sqlite", max_attempts=2)
+    queue.enqueue("run", _tasks())
+    for _ in range(2):
+        task = queue.claim("w")
+        queue.fail(task["task_id"], "w", "boom")
+    assert queue.claim("w") is None
+    assert queue.failures("run") == [("E0", "R0", "boom")]
+
+
+def test_cancel_queued_also_cancels_abandoned_running_tasks(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / "q.sqlite", lease_s=0.1, max_attempts=3)
+    queue.enqueue("run", _tasks(3))
+    queue.claim("dead-worker")
+    queue.claim("live-worker")
+    time.sleep(0.2)
+    queue.claim("live-worker")  # fresh lease on the dead worker's task
+
+    assert queue.cancel_queued("run") == 2  # the third task and the first live-worker lease
+    assert queue.outstanding("run") == 1
+
+
+def test_shard_count_is_stored_in_the_queue(tmp_path):
+    path = tmp_path / "q.sqlite"
+    assert SQLiteWorkQueue(path, n_shards=4).n_shards == 4
+    assert SQLiteWorkQueue(path).n_shards == 4
+    with pytest.raises(ValueError):
+        SQLiteWorkQueue(path, n_shards=8)
+
+
+def test_coordinator_returns_when_a_worker_dies_on_its_last_attempt(tmp_path):
+    from services.auditor import _dispatch_queue
+
+    queue = SQLiteWorkQueue(tmp_path / "q.sqlite", lease_s=0.1, max_attempts=1)
+    out = []
+    coordinator = threading.Thread(target=lambda: out.append(_dispatch_queue(_tasks(), queue, None, "run", None)),
+                                   daemon=True)
+    coordinator.start()
+    deadline = time.monotonic() + 5
+    while queue.claim("dead-worker") is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    coordinator.join(timeout=5)
+    assert not coordinator.is_alive()
+    assert out == [[]]
+
+
+class CountingQueue(SQLiteWorkQueue):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_slots = 0
+
+    def acquire_rate_slot(self, max_rps=None):
+        self.rate_slots += 1
+
+
+class UnsureRuntime:
+    """Answers without a confidence, so every screened group is escalated (two model calls)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        self.calls += 1
+        chunk = json.dumps({"delta": {"text": "Violation Rows: None\nException Rows: None"}}).encode()
+        return {"body": [{"chunk": {"bytes": chunk}}]}
+
+
+def test_every_model_call_takes_a_rate_slot(tmp_path, monkeypatch):
+    monkeypatch.setattr(auditor, "TIERED_AUDIT", True)
+    monkeypatch.setattr(auditor, "save_group_response", lambda *args, **kwargs: "nowhere")
+    queue = CountingQueue(tmp_path / "q.sqlite")
+    tasks = [{"employee_id": f"E{i}", "report_key": "R1", "findings_text": "",
+              "df_emp": pd.DataFrame({"Original Row": [10 + i], "Expense Type": ["Meals"]})} for i in range(2)]
+    queue.enqueue("run", tasks)
+    runtime = UnsureRuntime()
+
+    assert run_worker(queue, runtime, threads=1, idle_exit_s=0.1) == 2
+    assert runtime.calls == 4
+    assert queue.rate_slots == 4
@@ -0,0 +1,16 @@
+import pytest
+
+from services import charts, report_writer
+
+
+@pytest.mark.parametrize("module", [report_writer, charts], ids=["reports", "charts"])
+def test_shutdown_pool_stops_the_worker_processes(module):
+    pool = module._get_pool()
+    assert pool.submit(abs, -3).result(timeout=60) == 3
+    processes = list(pool._processes.values())
+
+    module.shutdown_pool()
+
+    assert module._pool is None
+    assert processes and not any(p.is_alive() for p in processes)
+    module.shutdown_pool()  # nothing left to stop